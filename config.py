@@ -1,3 +1,6 @@
+import os
+
+
 # EDITABLE CONSTANTS
 SETTINGS_DIR = "config"  # projectapp
 FIRSTAPP_DIR = "core"
@@ -19,6 +22,31 @@ PIP_PACKAGES = [
     "python-dotenv"
 ]
 
+# NPM packages to install
+NPM_DEV_PACKAGES = [
+    "tailwindcss"
+]
+NPM_PACKAGES = [
+    "flowbite",
+    "alpinejs"
+]
+
+# Local pip wheel and npm tarball cache, shared between projects
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'django_project_quickstart')
+CACHE_MAX_SIZE_MB = 2048
+
+# How static files and templates are copied into the project: 'copy', 'reflink' (shares data blocks until either file changes, where supported) or 'hardlink'
+# Note: hardlinked files are the same file, editing one in place also edits the original
+ASSET_COPY_MODE = "reflink"
+
+# Seconds the commands of each setup step can run for before they're stopped, by step name. Steps not listed use 'default', 'None' waits forever
+STEP_TIMEOUTS = {
+    "default": 600,
+    "venv": 1800,
+    "pip": 1800,
+    "npm": 1800,
+}
+
 # TEMPLATES DIRS additions
 TEMPLATES_DIRS_ADDITIONS = [
     "os.path.join(BASE_DIR, 'templates')"
@@ -27,8 +55,7 @@ TEMPLATES_DIRS_ADDITIONS = [
 # INSTALLED_APPS setting additions
 INSTALLED_APPS_3RDPARTY = [
     "compressor",
-    "django_htmx", 
-    "django_browser_reload"
+    "django_htmx"
 ]
 INSTALLED_APPS_LOCAL = [
     "core"
@@ -36,10 +63,21 @@ INSTALLED_APPS_LOCAL = [
 
 # MIDDLEWARE setting additions
 MIDDLEWARE_3RDPARTY = [
-    "django_browser_reload.middleware.BrowserReloadMiddleware",
     "django_htmx.middleware.HtmxMiddleware"
 ]
 
+# Development only additions, kept out of builds with DEBUG_MODE off
+INSTALLED_APPS_DEV = [
+    "django_browser_reload"
+]
+MIDDLEWARE_DEV = [
+    "django_browser_reload.middleware.BrowserReloadMiddleware"
+]
+URLPATTERNS_DEV = [
+    # (route, urls module)
+    ("__reload__/", "django_browser_reload.urls")
+]
+
 # STATICFILES setting additions
 NEW_STATICFILES_DIRS = [
     # "os.path.join(BASE_DIR, 'static')"  # example
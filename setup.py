@@ -1,501 +1,112 @@
 import argparse
-import os
-import shutil
-import subprocess
 import sys
-from functools import wraps
-import urllib.request
-
-from setup_assets.constants import *
-
-project_name = ''  # Modified by user input
-
-
-# Helper functions
-def __get_config_list_content(start_marker: str, end_marker: str, path: os.path) -> str:
-    """Helper function for `update_installed_apps()` and `update_middleware()`. Retrieves content in a `path` between `start_marker` and `end_marker`."""
-    with open(path, "r") as file:
-        content = file.readlines()
-
-    # Get start and end markers
-    for _, line in enumerate(content):
-        if line.startswith(start_marker):
-            start_marker = line
-
-        if line.startswith(end_marker):
-            end_marker = line
-            break
-
-
-    with open(path, "r") as file:
-        content = file.read()     
-
-    start_idx = content.find(start_marker)
-    end_idx = content.find(end_marker, start_idx)
-
-    content_str = content[start_idx:end_idx].strip()
-    return content_str
-
-
-def __settings_content_update(old_content: str, additions: str) -> None:
-    """Helper function for `update_installed_apps()` and `update_middleware()`. Updates a string of content given the `old_content` and a string of `additions`."""
-    new_content = old_content + additions
-    
-    @readwrite_file(path=ROOT_SETTINGS_PATH)
-    def update_content(content: str) -> str:
-        return content.replace(
-            old_content,
-            new_content.strip(),
-            1
-        )
-
-    update_content()
-
-
-def __handle_project_name(project_name: str) -> str:
-    """Helper function for replacing whitespace and dashes in the project name."""
-    name_split = []
-
-    if '-' in project_name:
-        name_split = project_name.split('-')
-    elif ' ' in project_name:
-        name_split = project_name.split(' ')
-
-    if len(name_split) != 0:
-        project_name = '_'.join(name_split)
-    
-    return project_name.strip()
-
-
-def __settings_formatter_loop(settings_items: list[str], additions: str) -> str:
-    """Helper function to create an `additions` string for adding items to the `settings.py` file. Loops through the `settings_items` and adapts them to a specific format before adding them to `additions`."""
-    for item in settings_items:
-        additions += ''.join(f"    '{item}',\n")
-    return additions
-
-
-# Decorators
-def readwrite_lines(path: str):
-    """Decorator for using 'file.readlines()' and updating content to it."""
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            with open(path, "r") as file:
-                content = file.readlines()
-
-            for i, line in enumerate(content):
-                content = func(content, i, line, *args, **kwargs)
-
-            with open(path, "w") as file:
-                file.writelines(content)
-
-        return wrapper
-    return decorator
-
-
-def readwrite_file(path: str):
-    """Decorator for using 'file.read()' and writing replacement content to it."""
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            with open(path, "r") as file:
-                content = file.read()
-
-            content = func(content, *args, **kwargs)
-
-            with open(path, "w") as file:
-                file.writelines(content)
-
-        return wrapper
-    return decorator
-
-
-# Setup functions
-def create_root_directory(name: str, outside_flag: bool, force_flag: bool) -> None:
-    """Creates the root project directory."""
-    name = __handle_project_name(name)
-    print(f"Project name set to: '{name}'.\n")
-
-    if outside_flag:
-        path = os.path.join(os.path.dirname(os.getcwd()), name)
-    else:
-        path = os.path.join(os.getcwd(), name)
-    
-    qs_dir = os.path.basename(os.getcwd())
-    parent_sq_dir = f"'{os.path.basename(os.path.dirname(path))}'"
-    outside_folder_text = f"outside '{qs_dir}' -> into {parent_sq_dir}"
-    inside_folder_text = f"inside '{qs_dir}'"
-    creation_str = f"{outside_folder_text if outside_flag else inside_folder_text}..."
-    print(f"Attempting project creation {creation_str}", end=' ')
-
-    if os.path.exists(path):
-        print('Failed.\n')
-        print(f"Project with name '{name}' already exists!")
-        if force_flag:
-            print("Attempting force deletion...", end=' ')
-            try:
-                if os.path.isdir(path):
-                    shutil.rmtree(path)
-                    print('Success!')
-                    print(f"Project successfully removed. Creating new one {creation_str} Success!")
-                else:
-                    print('Failed!')
-                    print(f"The path '{path}' is not a directory.")
-                    sys.exit()
-            except Exception as e:
-                print('Failed!')
-                print(f'Error: {path} -> {e}')
-                sys.exit()
-        else:
-            print(f"A project already exists with that name ('{name}')! Use the '--force' flag to delete it and create a new one.")
-            sys.exit()
-    else:
-        print('Success!')
-
-    os.makedirs(path)
-    print(f"Project '{name}' created at '{path}'.\n")
-    os.chdir(path)
-
-
-def create_virtual_environment() -> None:
-    subprocess.run(["python", "-m", "venv", "venv"])
-
-
-def install_packages() -> None:
-    subprocess.run([os.path.join(VENV, "pip"), "install", "--upgrade", "pip"])
-    subprocess.run([os.path.join(VENV, "pip"), "install", *PIP_PACKAGES])
-
-
-def create_requirements_txt() -> None:
-    with open("requirements.txt", "w") as file:
-        subprocess.Popen([os.path.join(VENV, "pip"), "freeze"], stdout=file)
-
-
-def run_django_startproject() -> None:
-    subprocess.run([os.path.join(VENV, "django-admin"), "startproject", SETTINGS_DIR, "."])
-    subprocess.run([os.path.join(VENV, "python"), "manage.py", "startapp", FIRSTAPP_DIR])
-
-
-def make_static_dirs() -> None:
-    os.makedirs(os.path.join(ROOT_STATIC_FOLDER_URL, "css"))
-    os.makedirs(os.path.join(ROOT_STATIC_FOLDER_URL, "js"))
-    os.makedirs(os.path.join(ROOT_STATIC_FOLDER_URL, "imgs"))
-
-
-def move_setup_assets_to_project() -> None:
-    """Duplicates the items in the `setup_assets` folder into the respective locations in the project directory."""
-    try:
-        # Move root folder assets into root project dir
-        shutil.copytree(SETUP_ASSETS_ROOT_DIR, os.getcwd(), dirs_exist_ok=True)
-
-        # Move static into firstapp static dir
-        shutil.copytree(SETUP_ASSETS_STATIC_DIR, ROOT_STATIC_FOLDER_URL, dirs_exist_ok=True)
-
-        # Move templates into firstapp templates dir
-        shutil.copytree(SETUP_ASSETS_TEMPLATE_DIR, ROOT_TEMPLATE_FOLDER_URL, dirs_exist_ok=True)
-
-        # Update firstapp folder name
-        setup_firstapp_dir_name = os.path.join(ROOT_TEMPLATE_FOLDER_URL, SETUP_FIRSTAPP_DIR)
-        new_firstapp_dir_name = os.path.join(os.path.dirname(setup_firstapp_dir_name), FIRSTAPP_DIR)
-
-        os.rename(setup_firstapp_dir_name, new_firstapp_dir_name)
-    except FileNotFoundError as e:
-        raise FileNotFoundError(f"{e}\nDoes a 'setup_assets' folder exist in: '{os.getcwd()}' and contain the required folder?")
-
-
-def configure_npm_assets() -> None:
-    subprocess.run(["npm", "install", "-D", "tailwindcss"], shell=True)
-    subprocess.run(["npm", "install", "flowbite", "alpinejs"], shell=True)
-    
-    subprocess.run(["npx", "tailwindcss", "-i", f"./{FIRSTAPP_DIR}/static/css/input.css", "-o", f"./{FIRSTAPP_DIR}/static/css/output.css"], shell=True)
-
-    # Update package.json for watching tailwindcss with 'dev' command
-    @readwrite_file(path=os.path.join(os.getcwd(), "package.json"))
-    def update_content(content: str) -> str:
-        old_content = '"devDependencies": {'
-        tw_css_cmd = f"npx tailwindcss -i ./{FIRSTAPP_DIR}/static/css/input.css -o ./{FIRSTAPP_DIR}/static/css/output.css --watch"
-        new_content = '"scripts": {\n\t\t"dev": ' + f'"{tw_css_cmd}"' + '\n\t},\n\t' + old_content
-
-        content = content.replace(
-            old_content,
-            new_content,
-            1
-        )
-        return content
-    
-    update_content()
-
-
-def download_js_libraries_to_static() -> None:
-    # Copy Flowbite from node_modules
-    shutil.copy(FLOWBITE_URL, os.path.join(ROOT_STATIC_FOLDER_URL, 'js', FLOWBITE_FILENAME))
-
-    # Retrieve HTMX from official downloads page
-    with urllib.request.urlopen(HTMX_URL) as response:
-        htmx_content = response.read().decode('utf-8')
-    
-    with open(os.path.join(ROOT_STATIC_FOLDER_URL, 'js', HTMX_FILENAME), 'w') as file:
-        file.write(htmx_content)
-
-    # Retrieve AlpineJS from node_modules
-    shutil.copy(ALPINE_URL, os.path.join(ROOT_STATIC_FOLDER_URL, 'js', ALPINE_FILENAME))
-
-
-@readwrite_file(path=ROOT_SETTINGS_PATH)
-def init_updates_to_settings_file(content: str) -> str:
-    # Replace import statement for BASE_DIR
-    content = content.replace(
-        "from pathlib import Path",
-        "from pathlib import Path\nimport os\nfrom dotenv import load_dotenv",
-        1
-    )
-
-    # Add load_dotenv() under BASE_DIR
-    content = content.replace(
-        "BASE_DIR = Path(__file__).resolve().parent.parent",
-        "BASE_DIR = Path(__file__).resolve().parent.parent\nload_dotenv()",
-        1
-    )
-
-    # Replace DEBUG with os.getenv
-    content = content.replace(
-        "DEBUG = True",
-        "DEBUG = os.getenv('DEBUG_MODE')",
-        1
-    )
-
-    # Add root templates directory to TEMPLATES/DIRS
-    new_template_dirs = '[\n'
-    for item in TEMPLATES_DIRS_ADDITIONS:
-        new_template_dirs += ''.join(f'\t\t\t{item},\n')
-    new_template_dirs += '\t\t],'
-
-    content = content.replace(
-        "'DIRS': [],",
-        f"'DIRS': {new_template_dirs}",
-        1
-    )
-    return content
-
-
-@readwrite_lines(path=ROOT_SETTINGS_PATH)
-def update_secret_key(content: str, i: int, line: str) -> str:
-    # Replace SECRET_KEY line with os.getenv
-    if line.startswith("SECRET_KEY"):
-        content[i] = "SECRET_KEY = os.getenv('DJANGO_SECRET_KEY')\n"
-    return content
-
-
-def generate_env_file() -> None:
-    with open(".env", "w") as file:
-        secret_key = subprocess.run(
-            [os.path.join(VENV, "python"), "manage.py", "shell", "-c", "from django.core.management.utils import get_random_secret_key; print(get_random_secret_key())"],
-            capture_output=True, text=True
-        ).stdout.strip()
-
-        file.write(f"DJANGO_SECRET_KEY={secret_key}\n")
-        file.write("DEBUG_MODE=True\n")
-        file.write(f"DJANGO_SUPERUSER_PASSWORD={SUPERUSER_PASSWORD}")
-
-    # Add additional custom config settings
-    with open(".env", "a") as file:
-        for item in ENV_FILE_ADDITIONAL_PARAMS:
-            file.write(item)
-
-
-def update_installed_apps() -> None:
-    installed_apps_str = __get_config_list_content("INSTALLED_APPS", "]", ROOT_SETTINGS_PATH)
-
-    additions = '\n\n    # 3rd party\n'
-    additions = __settings_formatter_loop(INSTALLED_APPS_3RDPARTY, additions)
-
-    additions += '\n    # local apps\n' 
-    additions = __settings_formatter_loop(INSTALLED_APPS_LOCAL, additions)
-
-    __settings_content_update(installed_apps_str, additions)
-
-
-def update_middleware() -> None:
-    middleware_str = "'django.contrib.sessions.middleware.SessionMiddleware',"
-
-    additions = '\n\n    # 3rd party\n'
-    additions = __settings_formatter_loop(MIDDLEWARE_3RDPARTY, additions)
-    additions += "\n    # Core\n"
-
-    __settings_content_update(middleware_str, additions)
-
-
-@readwrite_lines(path=ROOT_SETTINGS_PATH)
-def add_staticfiles_config(content: str, i: int, line: str) -> str:
-    if line.startswith("STATIC_URL"):
-        static_url_line = f"STATIC_URL = '{STATIC_URL}'\n"
-        static_root_line = f"STATIC_ROOT = os.path.join(BASE_DIR.parent, '{STATIC_ROOT_DIR}')\n\n"
-
-        staticfiles_dir_str = "STATICFILES_DIRS = [\n]\n\n"
-        staticfiles_finders_str = "STATICFILES_FINDERS = [\n    # Default finders\n"
-
-        staticfiles_finders_str = __settings_formatter_loop(STATICFILES_DEFAULT_FINDERS, staticfiles_finders_str)
-        staticfiles_finders_str += '\n    # 3rd party\n'
-
-        staticfiles_finders_str = __settings_formatter_loop(NEW_STATICFILES_3RDPARTY_FINDERS, staticfiles_finders_str)
-        staticfiles_finders_str += ']\n\n'
-
-        new_staticfile_settings = static_url_line + static_root_line + staticfiles_dir_str + staticfiles_finders_str
-        content[i] = new_staticfile_settings
-    return content
-
-
-@readwrite_file(path=ROOT_SETTINGS_PATH)
-def update_staticfiles_dirs(content: str) -> str:
-    staticfiles_dir_str = 'STATICFILES_DIRS = ['
-    for item in NEW_STATICFILES_DIRS:
-        staticfiles_dir_str += ''.join(f'\n   {item},')
-
-    content = content.replace(
-        "STATICFILES_DIRS = [",
-        staticfiles_dir_str,
-        1
-    )
-    return content
-
-
-def add_compressor_config() -> None:
-    with open(ROOT_SETTINGS_PATH, "a") as file:
-        file.write("\n# Django compressor\n")
-        file.write("# https://django-compressor.readthedocs.io/en/stable/\n\n")
-        file.write(f"COMPRESS_ROOT = os.path.join(BASE_DIR, '{FIRSTAPP_DIR}', 'static')\n")
-        file.write("COMPRESS_ENABLED = True\n")
-
-
-@readwrite_file(path=ROOT_URLS_PATH)
-def update_urlpatterns_root(content: str) -> str:
-    content = content.replace(
-        "from django.urls import path",
-        "from django.urls import include, path\nfrom django.conf import settings",
-        1
-    )
-
-    content = content.replace(
-        "path('admin/', admin.site.urls),",
-        f"path('admin/', admin.site.urls),\n\tpath('__reload__/', include('django_browser_reload.urls')),\n\tpath('', include('{FIRSTAPP_DIR}.urls')),",
-        1
-    )
-    return content
-
-
-def add_static_to_urlpatterns_root() -> None:
-    with open(ROOT_URLS_PATH, "a") as file:
-        file.write("\n\nif settings.DEBUG:\n")
-        file.write("\tfrom django.conf.urls.static import static\n")
-        file.write("\turlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)")
-
-
-def update_urlpatterns_core() -> None:
-    with open(FIRSTAPP_URLS_PATH, "a") as file:
-        file.write("from django.urls import path, include\n")
-        file.write("from . import views\n\n")
-        file.write("urlpatterns = [\n")
-        file.write("\tpath('', views.index, name='home'),\n")
-        file.write("]")
-
-
-def create_index_view_core() -> None:
-    with open(FIRSTAPP_VIEWS_PATH, "a") as file:
-        file.write("def index(request):\n")
-        file.write(f"\treturn render(request, '{FIRSTAPP_DIR}/index.html')")
-
-
-def migrate_db() -> None:
-    subprocess.run([os.path.join(VENV, "python"), "manage.py", "makemigrations"])
-    subprocess.run([os.path.join(VENV, "python"), "manage.py", "migrate"])
-
-
-def create_superuser() -> None:
-    subprocess.run([os.path.join(VENV, "python"), "manage.py", "createsuperuser", "--noinput", "--username", SUPERUSER_NAME, "--email", SUPERUSER_EMAIL])
-
-
-def run_setup() -> None:
-    # Step 2: Create a virtual environment
-    print('Creating virtual environment...')
-    create_virtual_environment()
-
-    # Step 3: Access virtual environment, update pip, and install packages
-    install_packages()
-
-    # Step 4: Create requirements.txt
-    create_requirements_txt()
-
-    # Step 5: Run django-admin startproject
-    run_django_startproject()
-
-    # Step 6: Moving root, static, and template setup assets to project
-    print('Creating static files and templates...', end='')
-    move_setup_assets_to_project()
-    print('Complete.')
-
-    # Step 7: Add initial updates to config/settings.py
-    print(f"Updating '{ROOT_SETTINGS_PATH}'...", end='')
-    init_updates_to_settings_file()
-
-    # Step 9: Update SECRET_KEY in config/settings.py
-    update_secret_key()
-
-    # Step 10: Generate .env file
-    generate_env_file()
-
-    # Step 11: Update INSTALLED_APPS in config/settings.py
-    update_installed_apps()
-
-    # Step 12: Update MIDDLEWARE in config/settings.py
-    update_middleware()
-
-    # Step 13: Add static files configuration to config/settings.py
-    add_staticfiles_config()
-    update_staticfiles_dirs()
-
-    # Step 14: Add compressor configuration to config/settings.py
-    add_compressor_config()
-    print("Complete.")
-
-    # Step 15: Add Tailwind CSS and Flowbite
-    print("Installing Tailwind CSS...")
-    configure_npm_assets()
-
-    # Step 16: Add HTMX, AlpineJS, and Flowbite to static folder
-    print("Downloading HTMX, AlpineJS, and Flowbite...", end='')
-    download_js_libraries_to_static()
-    print("Complete.")
-
-    # Step 17: Update config/urls.py and firstapp/urls.py
-    print(f"Updating '{ROOT_URLS_PATH}'...", end='')
-    update_urlpatterns_root()
-    add_static_to_urlpatterns_root()
-    print("Complete.")
-
-    print(f"Updating '{FIRSTAPP_DIR}'...", end='')
-    create_index_view_core()
-    update_urlpatterns_core()
-    print("Complete.")
-
-    # Step 18: Run initial database migration
-    print("Migrating database...")
-    migrate_db()
-    create_superuser()
-
-    # End of script
-    print("Setup completed successfully.")
 
 
+# The setup modules are imported once the arguments are parsed, so '--help' (and each process spawned by '--manifest' or 'benchmark') starts fast.
+# The setup itself lives in 'setup_assets/scaffold.py', which can also be used from Python, see `ScaffoldContext`
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="A simple way to create a new Django, TailwindCSS, HTMX, and AlpineJS project, fast.")
-    parser.add_argument("name", help="Name of the project directory. Note: automatically converts 'whitespace' and '-' to '_'.", type=str)
-    parser.add_argument("--outside", action="store_true", help="Create the directory outside the setup folder.")
-    parser.add_argument("--force", action="store_true", help="Forcefully remove an existing directory with the same name.")
-
-    args = parser.parse_args()
+    subparsers = parser.add_subparsers(dest="command")
+
+    create_parser = subparsers.add_parser("create", help="Create a new project (default).")
+    create_parser.add_argument("name", nargs="?", help="Name of the project directory. Note: automatically converts 'whitespace' and '-' to '_'.", type=str)
+    create_parser.add_argument("--outside", action="store_true", help="Create the directory outside the setup folder.")
+    create_parser.add_argument("--force", action="store_true", help="Forcefully remove an existing directory with the same name.")
+    create_parser.add_argument("--resume", action="store_true", help="Continue setting up an existing project, only rerunning the steps that didn't finish or whose inputs changed.")
+    create_parser.add_argument("--refresh-cache", action="store_true", help="Re-download the cached pip wheels and npm packages instead of reusing them.")
+    create_parser.add_argument("--golden-venv", action="store_true", help="Clone the virtual environment from a cached one with the packages pre-installed, instead of creating a new one.")
+    create_parser.add_argument("--prod-assets", action="store_true", help="Set up hashed, bundled and precompressed static files for production.")
+    create_parser.add_argument("--profile", choices=["development", "production"], default="development", help="Settings profile to generate. 'production' adds tuned database, cache, session and template settings. Defaults to 'development'.")
+    create_parser.add_argument("--standalone-tailwind", action="store_true", help="Build Tailwind CSS with its standalone CLI and download Flowbite and AlpineJS, instead of installing the NPM packages. Projects have no 'node_modules' folder.")
+    create_parser.add_argument("--offline-mirror", help="Folder to copy the JS libraries from, instead of downloading them. Files are still checked against the lockfile.")
+    create_parser.add_argument("--dry-run", action="store_true", help="Render the generated files in memory and print them as a tree (with a diff against an existing project), without creating anything or running any commands.")
+    create_parser.add_argument("--manifest", help="Path to a TOML file listing multiple projects (and their 'config.py' overrides) to create in one run.")
+    create_parser.add_argument("--jobs", type=int, help="Number of projects to create at the same time with '--manifest'. Defaults to the number of CPUs.")
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="Time the full setup and each step on its own, with a cold and warm cache, against local stand-ins for PyPI, npm and unpkg.")
+    benchmark_parser.add_argument("--output", default="benchmark.json", help="Path to save the JSON results to. Defaults to 'benchmark.json'.")
+    benchmark_parser.add_argument("--wheelhouse", help="Folder of wheels served by the PyPI stand-in. Defaults to the cached wheelhouse for 'PIP_PACKAGES'.")
+    benchmark_parser.add_argument("--npm-tarballs", help="Folder of npm package tarballs served by the npm registry stand-in. When missing, the 'npm' step is stubbed.")
+    benchmark_parser.add_argument("--htmx-file", help="File served by the unpkg stand-in. Defaults to a placeholder.")
+    benchmark_parser.add_argument("--stub", action="append", default=[], help="Replace a step with a stub that needs no network or subprocesses. Can be used multiple times.")
+    benchmark_parser.add_argument("--no-isolated", action="store_true", help="Only benchmark the full setup, not each step on its own.")
+    benchmark_parser.add_argument("--golden-venv", action="store_true", help="Benchmark with golden venv mode.")
+
+    update_parser = subparsers.add_parser("update", help="Apply changes made to 'config.py' to an existing project, keeping any edits made to it.")
+    update_parser.add_argument("name", help="Name of the project directory.", type=str)
+    update_parser.add_argument("--outside", action="store_true", help="The project is outside the setup folder.")
+
+    lock_parser = subparsers.add_parser("lock", help="Resolve the pip and NPM packages into 'requirements.lock' and 'package-lock.json', which later setups install from without resolving them again, and pin the JS library hashes in 'js_libraries.lock.json'.")
+    lock_parser.add_argument("--only", choices=["pip", "npm", "js"], help="Only lock the 'pip' or 'npm' packages, or the 'js' libraries.")
+    lock_parser.add_argument("--all-targets", action="store_true", help="Pin the Tailwind CSS standalone CLI for every OS in 'TAILWIND_STANDALONE_TARGETS', not just this one.")
+
+    # 'create' is the default command, so 'python setup.py my_project' keeps working
+    argv = sys.argv[1:]
+    if not argv or (argv[0] not in subparsers.choices and argv[0] not in ("-h", "--help")):
+        argv = ["create", *argv]
+
+    args = parser.parse_args(argv)
+
+    if args.command == "update":
+        from setup_assets.scaffold import project_context, project_directory, update_project
+        outcomes = update_project(project_context(project_directory(args.name, args.outside)))
+        sys.exit(1 if 'conflict' in outcomes.values() else 0)
+
+    if args.command == "lock":
+        from setup_assets.lockfiles import lock_packages
+        lock_packages(args.only, args.all_targets)
+        sys.exit()
+
+    from setup_assets.golden_venv import GOLDEN_VENV_SUPPORTED
+    golden_venv = args.golden_venv
+
+    if golden_venv and not GOLDEN_VENV_SUPPORTED:
+        print("Golden venv mode isn't supported on Windows, creating a new virtual environment instead.\n")
+        golden_venv = False
+
+    if args.command == "benchmark":
+        from setup_assets.benchmark import run_benchmark
+        run_benchmark(args.output, args.wheelhouse, args.npm_tarballs, args.htmx_file, args.stub, not args.no_isolated, golden_venv)
+        sys.exit()
+
+    if (args.name is None) == (args.manifest is None):
+        create_parser.error("provide either a project 'name' or a '--manifest'.")
+
+    options = {
+        "refresh_cache": args.refresh_cache,
+        "golden_venv": golden_venv,
+        "prod_assets": args.prod_assets,
+        "settings_profile": args.profile,
+        "offline_mirror": args.offline_mirror,
+        "standalone_tailwind": args.standalone_tailwind,
+    }
+
+    if args.dry_run:
+        if args.manifest:
+            create_parser.error("'--dry-run' only works with a project 'name'.")
+
+        from setup_assets.context import ScaffoldContext
+        from setup_assets.dry_run import dry_run
+        from setup_assets.scaffold import project_directory
+        sys.exit(0 if dry_run(ScaffoldContext.from_config(project_directory(args.name, args.outside), **options)) else 1)
+
+    if args.manifest:
+        from config import CACHE_DIR
+        from setup_assets.batch import run_batch
+        from setup_assets.cache import clear_cache
+
+        # Refresh once up front, rather than in every project
+        if args.refresh_cache:
+            clear_cache(CACHE_DIR)
+
+        results = run_batch(args.manifest, args.jobs, {**options, "force": args.force, "resume": args.resume, "refresh_cache": False})
+        sys.exit(0 if all(result["ok"] for result in results) else 1)
+
+    from setup_assets.context import ScaffoldContext
+    from setup_assets.scaffold import create_root_directory, run_setup
 
     # Step 1: Create a root project directory
-    create_root_directory(args.name, args.outside, args.force)
+    project_dir = create_root_directory(args.name, args.outside, args.force, args.resume)
 
     # Run setup
-    run_setup()
+    run_setup(ScaffoldContext.from_config(project_dir, **options), args.resume)
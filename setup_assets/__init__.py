@@ -0,0 +1,29 @@
+"""
+The project setup as an importable package, for creating projects from Python instead of `setup.py`:
+
+    from setup_assets import ScaffoldContext, create_root_directory, run_setup
+
+    project_dir = create_root_directory("my_project", outside_flag=False, force_flag=False)
+    run_setup(ScaffoldContext.from_config(project_dir, {"FIRSTAPP_DIR": "home"}, golden_venv=True))
+
+The names below are imported on first use, so importing one module doesn't load the rest.
+"""
+import importlib
+
+
+EXPORTS = {
+    "ScaffoldContext": "setup_assets.context",
+    "create_root_directory": "setup_assets.scaffold",
+    "project_context": "setup_assets.scaffold",
+    "run_setup": "setup_assets.scaffold",
+    "setup_steps": "setup_assets.scaffold",
+    "update_project": "setup_assets.scaffold",
+}
+
+__all__ = list(EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in EXPORTS:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    return getattr(importlib.import_module(EXPORTS[name]), name)
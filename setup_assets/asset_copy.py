@@ -0,0 +1,95 @@
+import filecmp
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# Linux ioctl that shares a file's data blocks with another file, on filesystems that support it (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+COPY_MODES = ("copy", "reflink", "hardlink")
+
+
+def plan_copies(src_dir: str, dest_dir: str, renames: dict[str, str] | None = None) -> list[tuple[str, str]]:
+    """Returns a `(src, dest)` pair for every file in `src_dir`, mapped into `dest_dir`. Top-level folders in `renames` are written under their new name."""
+    if not os.path.isdir(src_dir):
+        raise FileNotFoundError(f"No such directory: '{src_dir}'")
+
+    renames = renames or {}
+    copies = []
+    for root, _, files in os.walk(src_dir):
+        parts = os.path.relpath(root, src_dir).split(os.sep)
+        if parts[0] in renames:
+            parts[0] = renames[parts[0]]
+
+        for name in files:
+            copies.append((os.path.join(root, name), os.path.normpath(os.path.join(dest_dir, *parts, name))))
+    return copies
+
+
+def __is_unchanged(src: str, dest: str) -> bool:
+    """Helper function for `copy_file()`. Checks if `dest` already has the same contents as `src`."""
+    if not os.path.isfile(dest):
+        return False
+    if os.path.samefile(src, dest):
+        return True
+    return os.path.getsize(src) == os.path.getsize(dest) and filecmp.cmp(src, dest, shallow=False)
+
+
+def __reflink(src: str, dest: str) -> bool:
+    """Helper function for `copy_file()`. Clones `src` into `dest`, returning `False` where the platform or filesystem doesn't support it."""
+    if fcntl is None or not hasattr(fcntl, "ioctl"):
+        return False
+
+    with open(src, "rb") as src_file, open(dest, "wb") as dest_file:
+        try:
+            fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+        except OSError:
+            return False
+
+    shutil.copystat(src, dest)
+    return True
+
+
+def __hardlink(src: str, dest: str) -> bool:
+    """Helper function for `copy_file()`. Links `dest` to `src`, returning `False` where they're on different filesystems (or links aren't supported)."""
+    tmp_dest = f"{dest}.tmp-{os.getpid()}"
+    try:
+        os.link(src, tmp_dest)
+    except OSError:
+        return False
+
+    os.replace(tmp_dest, dest)
+    return True
+
+
+def copy_file(src: str, dest: str, mode: str = "copy") -> str:
+    """Copies a file with a `COPY_MODES` method, falling back to a normal copy when it isn't available. Files that already match are skipped. Returns the method used, or `'skipped'`."""
+    if __is_unchanged(src, dest):
+        return "skipped"
+
+    os.makedirs(os.path.dirname(dest) or '.', exist_ok=True)
+    if mode == "reflink" and __reflink(src, dest):
+        return "reflink"
+    if mode == "hardlink" and __hardlink(src, dest):
+        return "hardlink"
+
+    shutil.copy2(src, dest)
+    return "copy"
+
+
+def copy_files(copies: list[tuple[str, str]], mode: str = "copy", max_workers: int | None = None) -> dict[str, int]:
+    """Copies the `(src, dest)` pairs in parallel, see `copy_file()`. Returns the number of files per method used."""
+    if mode not in COPY_MODES:
+        raise ValueError(f"Unknown copy mode '{mode}', expected one of {COPY_MODES}.")
+
+    counts = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for method in pool.map(lambda pair: copy_file(*pair, mode), copies):
+            counts[method] = counts.get(method, 0) + 1
+    return counts
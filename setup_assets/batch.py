@@ -0,0 +1,126 @@
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+def load_manifest(path: str) -> list[dict]:
+    """Reads a TOML manifest of projects. Each `[[projects]]` entry needs a `name` and can set `outside` and a `config` table of `config.py` overrides. A top-level `[defaults]` table holds overrides for every project."""
+    try:
+        import tomllib
+    except ImportError:
+        raise RuntimeError("Reading a manifest requires Python 3.11 or newer.")
+
+    import config
+    with open(path, "rb") as file:
+        manifest = tomllib.load(file)
+
+    defaults = manifest.get("defaults", {})
+    projects = []
+
+    for idx, entry in enumerate(manifest.get("projects", [])):
+        if "name" not in entry:
+            raise ValueError(f"Project {idx + 1} in '{path}' is missing a 'name'.")
+
+        overrides = {**defaults, **entry.get("config", {})}
+        unknown = [key for key in overrides if not key.isupper() or not hasattr(config, key)]
+        if unknown:
+            raise ValueError(f"Unknown 'config.py' settings for project '{entry['name']}': {unknown}.")
+
+        projects.append({"name": entry["name"], "outside": entry.get("outside", False), "config": overrides})
+
+    if not projects:
+        raise ValueError(f"No [[projects]] found in '{path}'.")
+
+    names = [project["name"] for project in projects]
+    duplicates = {name for name in names if names.count(name) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate project names in '{path}': {sorted(duplicates)}.")
+
+    return projects
+
+
+def build_project(project: dict, options: dict) -> dict:
+    """Creates a single project in a fresh process, with its `config.py` overrides applied to its `ScaffoldContext`. All output goes to the project's log file."""
+    from setup_assets.context import ScaffoldContext
+    from setup_assets.scaffold import create_root_directory, run_setup
+
+    result = {"name": project["name"], "ok": False, "error": None, "timings": {}, "duration": 0.0}
+    start = time.perf_counter()
+
+    os.makedirs(options["log_dir"], exist_ok=True)
+    with open(os.path.join(options["log_dir"], f"{project['name']}.log"), "w") as log:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+
+        try:
+            project_dir = create_root_directory(project["name"], project["outside"], options["force"], options["resume"])
+            ctx = ScaffoldContext.from_config(
+                project_dir, project["config"], refresh_cache=options["refresh_cache"], golden_venv=options["golden_venv"],
+                prod_assets=options["prod_assets"], settings_profile=options["settings_profile"], offline_mirror=options["offline_mirror"],
+                standalone_tailwind=options["standalone_tailwind"]
+            )
+            result["timings"] = run_setup(ctx, options["resume"])
+            result["ok"] = True
+        except BaseException as e:
+            # 'create_root_directory()' exits on failure, which must not reach the parent process
+            result["error"] = f"{type(e).__name__}: {e}"
+
+        sys.stdout.flush()
+
+    result["duration"] = time.perf_counter() - start
+    return result
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Returns the `pct` percentile of `values`, using the nearest-rank method."""
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def print_batch_summary(results: list[dict], wall_time: float) -> None:
+    """Prints the throughput of a batch and the p50/p95 duration of each step across its projects."""
+    succeeded = [result for result in results if result["ok"]]
+    step_durations = {}
+    for result in succeeded:
+        for step, duration in result["timings"].items():
+            step_durations.setdefault(step, []).append(duration)
+
+    print(f"\nBuilt {len(succeeded)}/{len(results)} projects in {wall_time:.2f}s ({len(succeeded) / wall_time * 60:.2f} projects/min).")
+
+    if step_durations:
+        width = max(len(step) for step in step_durations)
+        print(f"\n  {'step':<{width}}  {'p50':>7}  {'p95':>7}")
+        for step, durations in step_durations.items():
+            print(f"  {step:<{width}}  {percentile(durations, 50):6.2f}s  {percentile(durations, 95):6.2f}s")
+
+    for result in results:
+        if not result["ok"]:
+            print(f"\nProject '{result['name']}' failed: {result['error']}")
+
+
+def run_batch(manifest_path: str, jobs: int | None, options: dict) -> list[dict]:
+    """Creates every project in a manifest across a process pool. Each project is built in its own process, so the step output of one never mixes with another's. Caches in `CACHE_DIR` are shared between them."""
+    manifest_path = os.path.abspath(manifest_path)
+    projects = load_manifest(manifest_path)
+    options = {**options, "log_dir": os.path.join(os.path.dirname(manifest_path), "logs")}
+
+    print(f"Creating {len(projects)} projects from '{manifest_path}', logs in '{options['log_dir']}'...")
+    start = time.perf_counter()
+    results = []
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context, max_tasks_per_child=1) as pool:
+        futures = [pool.submit(build_project, project, options) for project in projects]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"  [{len(results)}/{len(projects)}] {result['name']}: {'Success' if result['ok'] else 'Failed'} ({result['duration']:.2f}s)")
+
+    print_batch_summary(results, time.perf_counter() - start)
+    return results
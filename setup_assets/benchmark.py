@@ -0,0 +1,374 @@
+import base64
+import dataclasses
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import re
+import shutil
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from setup_assets.scheduler import required_steps, run_steps
+
+
+# Placeholder served by the unpkg stand-in when no HTMX file is given
+HTMX_PLACEHOLDER = b"/* htmx stand-in for benchmarking */\n" + b"(function(){})();\n" * 2048
+
+
+class StandInServer:
+    """A local HTTP server that stands in for PyPI (a PEP 503 simple index of a wheel directory), the npm registry (packuments generated from a directory of package tarballs) and unpkg (a single HTMX file). Counts the bytes it serves."""
+    def __init__(self, wheelhouse: str | None, npm_tarballs: str | None, htmx_file: str | None) -> None:
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+
+        self.wheels = {}
+        if wheelhouse:
+            for name in os.listdir(wheelhouse):
+                if name.endswith('.whl'):
+                    self.wheels.setdefault(self.__normalise_name(name.split('-')[0]), []).append(os.path.join(wheelhouse, name))
+
+        self.npm_files = {}
+        self.packuments = {}
+        if npm_tarballs:
+            for name in sorted(os.listdir(npm_tarballs)):
+                if name.endswith('.tgz'):
+                    self.__add_npm_tarball(os.path.join(npm_tarballs, name))
+
+        if htmx_file:
+            with open(htmx_file, "rb") as file:
+                self.htmx = file.read()
+        else:
+            self.htmx = HTMX_PLACEHOLDER
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body, content_type = server.route(urllib.parse.unquote(self.path))
+                if body is None:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                server.count(len(body))
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @staticmethod
+    def __normalise_name(name: str) -> str:
+        """Normalises a PyPI project name following PEP 503."""
+        return re.sub(r"[-_.]+", "-", name).lower()
+
+    @staticmethod
+    def __read_npm_tarball(path: str) -> dict:
+        """Returns the `package.json` inside an npm tarball."""
+        with tarfile.open(path, "r:gz") as tar:
+            for member in tar.getmembers():
+                if member.name.count('/') == 1 and member.name.endswith('/package.json'):
+                    return json.load(tar.extractfile(member))
+        raise ValueError(f"No 'package.json' found in '{path}'.")
+
+    def __add_npm_tarball(self, path: str) -> None:
+        package = self.__read_npm_tarball(path)
+        filename = os.path.basename(path)
+        with open(path, "rb") as file:
+            integrity = "sha512-" + base64.b64encode(hashlib.sha512(file.read()).digest()).decode()
+
+        self.npm_files[filename] = path
+        packument = self.packuments.setdefault(package["name"], {"name": package["name"], "versions": {}, "dist-tags": {}})
+        packument["versions"][package["version"]] = {
+            **{key: package[key] for key in ("name", "version", "dependencies", "peerDependencies", "bin", "engines") if key in package},
+            "dist": {"tarball": f"/npm/-/{filename}", "integrity": integrity},
+        }
+        packument["dist-tags"]["latest"] = package["version"]
+
+    def route(self, path: str) -> tuple[bytes | None, str]:
+        """Returns the body and content type for a request `path`, or `None` if it doesn't exist."""
+        if path.startswith("/pypi/simple/"):
+            project = path[len("/pypi/simple/"):].strip('/')
+            if not project:
+                links = ''.join(f'<a href="/pypi/simple/{name}/">{name}</a>\n' for name in sorted(self.wheels))
+                return links.encode(), "text/html"
+            if self.__normalise_name(project) in self.wheels:
+                links = ''.join(f'<a href="/pypi/files/{os.path.basename(wheel)}">{os.path.basename(wheel)}</a>\n' for wheel in self.wheels[self.__normalise_name(project)])
+                return links.encode(), "text/html"
+            return None, ''
+
+        if path.startswith("/pypi/files/"):
+            name = os.path.basename(path)
+            for wheels in self.wheels.values():
+                for wheel in wheels:
+                    if os.path.basename(wheel) == name:
+                        return self.__read(wheel), "application/octet-stream"
+            return None, ''
+
+        if path.startswith("/npm/-/"):
+            tarball = self.npm_files.get(os.path.basename(path))
+            return (self.__read(tarball), "application/octet-stream") if tarball else (None, '')
+
+        if path.startswith("/npm/"):
+            packument = self.packuments.get(path[len("/npm/"):])
+            if packument is None:
+                return None, ''
+            # Tarball urls must be absolute
+            packument = json.loads(json.dumps(packument).replace('"/npm/-/', f'"{self.url}/npm/-/'))
+            return json.dumps(packument).encode(), "application/json"
+
+        if path.startswith("/unpkg/"):
+            return self.htmx, "application/javascript"
+
+        return None, ''
+
+    def __read(self, path: str) -> bytes:
+        with open(path, "rb") as file:
+            return file.read()
+
+    def count(self, size: int) -> None:
+        with self.lock:
+            self.bytes_sent += size
+
+    def take_bytes(self) -> int:
+        """Returns the bytes served since the last call, and resets the count."""
+        with self.lock:
+            sent, self.bytes_sent = self.bytes_sent, 0
+        return sent
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# Stubs for steps whose stand-ins aren't available, they create the files later steps expect without any network or subprocess work
+def __stub_npm_assets(ctx) -> None:
+    """Stub for the 'npm' step. Creates the `node_modules` files, `package.json` and Tailwind output used by later steps."""
+    for path in (ctx.path(ctx.FLOWBITE_URL), ctx.path(ctx.ALPINE_URL)):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write("/* npm stand-in */\n")
+
+    with open(ctx.path("package.json"), "w") as file:
+        json.dump({"scripts": {}, "devDependencies": {}}, file)
+
+    with open(ctx.path(ctx.tailwind_output_css_path), "w") as file:
+        file.write("/* tailwind stand-in */\n")
+
+
+def __stub_js_libraries(ctx) -> None:
+    """Stub for the 'js-libraries' step. Writes the HTMX placeholder."""
+    with open(ctx.path(ctx.static_dir, "js", ctx.HTMX_FILENAME), "wb") as file:
+        file.write(HTMX_PLACEHOLDER)
+
+
+STEP_STUBS = {
+    "npm": __stub_npm_assets,
+    "js-libraries": __stub_js_libraries,
+}
+
+
+# Measurements, each one runs in a fresh process
+def __usage() -> tuple[float, int]:
+    """Helper function for `run_measurement()`. Returns the CPU time used by this process and its waited-for children, and their peak RSS in KB."""
+    if resource is None:
+        return time.process_time(), 0
+
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+    # macOS reports bytes, Linux reports KB
+    peak_rss = max(own.ru_maxrss, children.ru_maxrss)
+    if sys.platform == "darwin":
+        peak_rss //= 1024
+    return cpu, peak_rss
+
+
+def run_measurement(spec: dict) -> dict:
+    """Runs a set of setup steps in the `project_dir` of the `spec`, against the stand-ins, and returns their wall time, CPU time and peak RSS."""
+    for key in spec["unset_env"]:
+        os.environ.pop(key, None)
+    os.environ.update(spec["env"])
+
+    from setup_assets.constants import HTMX_FILENAME
+    from setup_assets.context import ScaffoldContext
+    from setup_assets.downloads import save_lockfile
+    from setup_assets.scaffold import setup_steps, start_django_worker
+
+    # The stand-in's HTMX is pinned up front, as unpinned downloads are refused
+    lockfile = os.path.join(spec["cache_dir"], "js_libraries.lock.json")
+    os.makedirs(spec["cache_dir"], exist_ok=True)
+    save_lockfile(lockfile, {spec["htmx_url"]: spec["htmx_integrity"]})
+
+    overrides = {
+        "CACHE_DIR": spec["cache_dir"],
+        "JS_LIBRARIES": {HTMX_FILENAME: spec["htmx_url"]},
+        "JS_LIBRARIES_LOCKFILE": lockfile,
+        # The stand-ins serve their own builds, which wouldn't match the hashes in the package lockfiles
+        "PIP_LOCKFILE": os.path.join(spec["cache_dir"], "requirements.lock"),
+        "NPM_LOCKFILE": os.path.join(spec["cache_dir"], "package-lock.json"),
+    }
+    ctx = ScaffoldContext.from_config(spec["project_dir"], overrides, golden_venv=spec["golden_venv"])
+
+    steps = [
+        dataclasses.replace(step, func=functools.partial(STEP_STUBS[step.name], ctx)) if step.name in spec["stubs"] else step
+        for step in setup_steps(ctx) if step.name in spec["steps"]
+    ]
+
+    os.makedirs(spec["project_dir"], exist_ok=True)
+    result = {"ok": True, "error": None}
+
+    # Keep the step output out of the benchmark report, errors still go to stderr
+    with open(os.devnull, "w") as devnull:
+        sys.stdout.flush()
+        os.dup2(devnull.fileno(), 1)
+
+    if spec["start_worker"]:
+        start_django_worker(ctx)
+
+    start_cpu, _ = __usage()
+    start = time.perf_counter()
+    try:
+        run_steps(steps, available=tuple(spec["available"]))
+    except Exception as e:
+        result.update(ok=False, error=str(e))
+    finally:
+        if ctx.django_worker is not None:
+            ctx.django_worker.close()
+
+    result["wall_s"] = time.perf_counter() - start
+    end_cpu, peak_rss = __usage()
+    result.update(cpu_s=end_cpu - start_cpu, peak_rss_kb=peak_rss)
+    return result
+
+
+def __measure_in_new_process(context, spec: dict) -> dict:
+    """Helper function for `run_benchmark()`. Runs `run_measurement()` in a new process, so nothing imported or cached by an earlier run is reused, and its peak RSS is its own."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_measurement, spec).result()
+
+
+def run_benchmark(output_path: str, wheelhouse: str | None, npm_tarballs: str | None, htmx_file: str | None, stubs: list[str], isolated: bool, golden_venv: bool) -> dict:
+    """Benchmarks the full setup pipeline and each step in isolation, with a cold (empty) and warm (populated) cache, against local stand-ins. Writes the results to `output_path` as JSON."""
+    import config
+    from setup_assets.cache import cache_entry_path, package_set_key
+    from setup_assets.constants import HTMX_FILENAME
+    from setup_assets.context import ScaffoldContext
+    from setup_assets.downloads import content_integrity
+    from setup_assets.scaffold import setup_steps
+
+    if wheelhouse is None:
+        wheelhouse = cache_entry_path(config.CACHE_DIR, "wheels", package_set_key(["pip"], config.PIP_PACKAGES))
+    if not os.path.isdir(wheelhouse):
+        raise FileNotFoundError(f"No wheelhouse found at '{wheelhouse}'. Create a project normally first to fill the cache, or pass '--wheelhouse'.")
+
+    stubs = sorted(set(stubs) | ({"npm"} if npm_tarballs is None else set()))
+    unknown = [stub for stub in stubs if stub not in STEP_STUBS]
+    if unknown:
+        raise ValueError(f"No stub available for steps {unknown}, choose from {sorted(STEP_STUBS)}.")
+
+    server = StandInServer(wheelhouse, npm_tarballs, htmx_file)
+    work_dir = tempfile.mkdtemp(prefix="quickstart-benchmark-")
+    warm_cache = os.path.join(work_dir, "cache-warm")
+
+    # Only the step names and resources are used here, the steps run in each measurement's own context
+    steps = setup_steps(ScaffoldContext.from_config(work_dir))
+    step_names = [step.name for step in steps]
+    base_spec = {
+        "env": {
+            "PIP_INDEX_URL": f"{server.url}/pypi/simple/",
+            "PIP_CONFIG_FILE": os.devnull,
+            "npm_config_registry": f"{server.url}/npm/",
+        },
+        "unset_env": ["PIP_EXTRA_INDEX_URL", "PIP_FIND_LINKS"],
+        "htmx_url": f"{server.url}/unpkg/{HTMX_FILENAME}",
+        "htmx_integrity": content_integrity(server.htmx),
+        "stubs": stubs,
+        "golden_venv": golden_venv,
+    }
+
+    # (target, cache, steps to prepare unmeasured, steps to measure)
+    plan = [
+        ("pipeline", "cold", [], step_names),
+        ("pipeline", "warm", [], step_names),
+    ]
+    if isolated:
+        for name in step_names:
+            prepare = required_steps(steps, [name])
+            plan += [(name, "cold", prepare, [name]), (name, "warm", prepare, [name])]
+
+    runs = []
+    context = multiprocessing.get_context("spawn")
+
+    try:
+        for idx, (target, cache, prepare, measure) in enumerate(plan):
+            cache_dir = warm_cache if cache == "warm" or target == "pipeline" else os.path.join(work_dir, f"cache-cold-{idx}")
+            project_dir = os.path.join(work_dir, f"run-{idx}")
+            print(f"Benchmarking {target} ({cache} cache)...", end=' ', flush=True)
+
+            spec = {**base_spec, "cache_dir": cache_dir, "project_dir": project_dir}
+            if prepare:
+                __measure_in_new_process(context, {**spec, "steps": prepare, "available": [], "start_worker": False})
+
+            server.take_bytes()
+            available = [resource for step in steps if step.name in prepare for resource in step.provides]
+            start_worker = "django-worker" in prepare
+            result = __measure_in_new_process(context, {**spec, "steps": measure, "available": available, "start_worker": start_worker})
+
+            result.update(target=target, cache=cache, bytes_downloaded=server.take_bytes(), stubbed=[stub for stub in stubs if stub in measure])
+            runs.append(result)
+            print(f"{result['wall_s']:.2f}s" if result["ok"] else f"Failed: {result['error']}")
+
+            shutil.rmtree(project_dir, ignore_errors=True)
+            if cache_dir != warm_cache:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+    finally:
+        server.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pip_packages": config.PIP_PACKAGES,
+        "npm_packages": config.NPM_DEV_PACKAGES + config.NPM_PACKAGES,
+        "golden_venv": golden_venv,
+        "runs": runs,
+    }
+
+    with open(output_path, "w") as file:
+        json.dump(report, file, indent=2)
+
+    print_benchmark(runs)
+    print(f"\nResults saved to '{output_path}'.")
+    return report
+
+
+def print_benchmark(runs: list[dict]) -> None:
+    """Prints a table of benchmark results."""
+    width = max(len(run["target"]) for run in runs)
+    print(f"\n  {'target':<{width}}  {'cache':<5}  {'wall':>8}  {'cpu':>8}  {'peak rss':>10}  {'downloaded':>11}")
+    for run in runs:
+        status = '' if run["ok"] else '  (failed)'
+        print(f"  {run['target']:<{width}}  {run['cache']:<5}  {run['wall_s']:7.2f}s  {run['cpu_s']:7.2f}s  {run['peak_rss_kb'] / 1024:7.1f} MB  {run['bytes_downloaded'] / 1024:8.1f} KB{status}")
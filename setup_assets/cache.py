@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import platform
+import shutil
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def platform_key() -> list[str]:
+    """Returns the Python version, OS and architecture, which built wheels depend on."""
+    return [sys.implementation.cache_tag, sys.platform, platform.machine()]
+
+
+def package_set_key(*package_lists: list[str], platform_specific: bool = True) -> str:
+    """Creates a content hash for a set of packages. Order and duplicates are ignored. Platform specific keys also include the `platform_key()`."""
+    packages = sorted({package.strip().lower() for packages in package_lists for package in packages})
+    payload = {"packages": packages}
+
+    if platform_specific:
+        payload["platform"] = platform_key()
+
+    encoded = json.dumps(payload, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def files_key(*paths: str, extra: object = None) -> str:
+    """Creates a content hash for the files at `paths` (files or folders) and any `extra` JSON data. Missing paths are ignored."""
+    digest = hashlib.sha256(json.dumps(extra, sort_keys=True, default=str).encode('utf-8'))
+
+    for path in paths:
+        if os.path.isfile(path):
+            files = [path]
+        else:
+            files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+
+        for file_path in files:
+            digest.update(os.path.relpath(file_path, path).encode('utf-8'))
+            with open(file_path, "rb") as file:
+                digest.update(hashlib.sha256(file.read()).digest())
+
+    return digest.hexdigest()[:16]
+
+
+def cache_entry_path(cache_dir: str, kind: str, key: str) -> str:
+    """Returns the path to a cache entry, e.g. `<cache_dir>/wheels/<key>`."""
+    return os.path.join(cache_dir, kind, key)
+
+
+def new_entry_dir(entry_path: str) -> str:
+    """Creates and returns a temporary directory next to `entry_path` to build a new entry in. Use `publish_entry()` to move it into place."""
+    tmp_path = f"{entry_path}.tmp-{os.getpid()}-{time.time_ns()}"
+    os.makedirs(tmp_path)
+    return tmp_path
+
+
+@contextmanager
+def entry_lock(entry_path: str):
+    """Holds an exclusive lock on a cache entry, so only one process builds it at a time while the others wait and reuse it. Locking is skipped where `fcntl` isn't available, `publish_entry()` still keeps the first copy."""
+    os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+
+    with open(f"{entry_path}.lock", "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextmanager
+def build_entry(entry_path: str, replace: bool = False):
+    """Yields a temporary directory to build a new entry in. It's published with `publish_entry()` on success and removed on failure."""
+    tmp_path = new_entry_dir(entry_path)
+    try:
+        yield tmp_path
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    publish_entry(tmp_path, entry_path, replace)
+
+
+def publish_entry(tmp_path: str, entry_path: str, replace: bool = False) -> None:
+    """Moves a fully built entry into place. An existing entry is kept (and the new one discarded) unless `replace` is set, as other projects may be reading from it."""
+    if os.path.isdir(entry_path):
+        if not replace:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            touch_entry(entry_path)
+            return
+
+        old_path = f"{entry_path}.tmp-old-{os.getpid()}-{time.time_ns()}"
+        os.rename(entry_path, old_path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    try:
+        os.rename(tmp_path, entry_path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+    touch_entry(entry_path)
+
+
+def touch_entry(entry_path: str) -> None:
+    """Marks a cache entry as recently used."""
+    os.utime(entry_path)
+
+
+def clear_cache(cache_dir: str) -> None:
+    """Removes every cache entry."""
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def __dir_size(path: str) -> int:
+    """Helper function for `evict_cache()`. Returns the total size of the files in `path`, in bytes."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def evict_cache(cache_dir: str, max_size_mb: int, keep: tuple[str, ...] = ()) -> list[str]:
+    """Removes the least recently used entries until the cache is below `max_size_mb`. Entries in `keep` are never removed. Returns the removed entry paths."""
+    if not os.path.isdir(cache_dir):
+        return []
+
+    entries = []
+    for kind in os.listdir(cache_dir):
+        kind_dir = os.path.join(cache_dir, kind)
+        if not os.path.isdir(kind_dir):
+            continue
+
+        for name in os.listdir(kind_dir):
+            path = os.path.join(kind_dir, name)
+            if os.path.isdir(path) and '.tmp-' not in name and not name.endswith('.lock'):
+                entries.append((os.path.getmtime(path), __dir_size(path), path))
+
+    total = sum(size for _, size, _ in entries)
+    max_bytes = max_size_mb * 1024 * 1024
+    removed = []
+
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+
+        if path in keep:
+            continue
+
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        removed.append(path)
+
+    return removed
@@ -4,11 +4,13 @@ import sys
 from config import *
 
 
-# Change venv activation depending on OS
+# Change venv activation and executable names depending on OS
 if sys.platform.startswith("win"):
     VENV = "venv\\Scripts"
+    TAILWIND_STANDALONE_FILENAME = "tailwindcss.exe"
 else:
     VENV = "venv/bin/"
+    TAILWIND_STANDALONE_FILENAME = "tailwindcss"
 
 
 # Setup assets directory name and child directory names
@@ -19,25 +21,30 @@ SETUP_ROOT_ASSETS_TEMPLATE_FOLDER = 'templates'
 
 SETUP_FIRSTAPP_DIR = 'firstapp'
 
-# Setup assets filepaths
-SETUP_ROOT_DIR = os.path.dirname(os.path.join(os.getcwd(), SETUP_ROOT_ASSETS_NAME))
+# Setup assets filepaths, resolved from this file so the tool works from any directory
+SETUP_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SETUP_ASSETS_DIR = os.path.join(SETUP_ROOT_DIR, SETUP_ROOT_ASSETS_NAME)
 SETUP_ASSETS_ROOT_DIR = os.path.join(SETUP_ASSETS_DIR, SETUP_ROOT_ASSETS_ROOT_FOLDER)
 SETUP_ASSETS_STATIC_DIR = os.path.join(SETUP_ASSETS_DIR, SETUP_ROOT_ASSETS_STATIC_FOLDER)
 SETUP_ASSETS_TEMPLATE_DIR = os.path.join(SETUP_ASSETS_DIR, SETUP_ROOT_ASSETS_TEMPLATE_FOLDER)
+SETUP_ASSETS_PERFORMANCE_DIR = os.path.join(SETUP_ASSETS_DIR, 'performance')
 
 
-# Settings and url file paths associated to STARTPROJECT
-ROOT_SETTINGS_PATH = os.path.join(SETTINGS_DIR, "settings.py")
-ROOT_URLS_PATH = os.path.join(SETTINGS_DIR, "urls.py")
+# Setup run records, stored in the project directory
+SETUP_RECORDS_DIR = '.quickstart'
+SETUP_EVENTS_PATH = os.path.join(SETUP_RECORDS_DIR, 'events.jsonl')
+SETUP_LOGS_DIR = os.path.join(SETUP_RECORDS_DIR, 'logs')
+SETUP_JOURNAL_PATH = os.path.join(SETUP_RECORDS_DIR, 'journal.json')
+# Copies of the generated files as last written by the setup, for 'update'
+SETUP_GENERATED_DIR = os.path.join(SETUP_RECORDS_DIR, 'generated')
+SETUP_GENERATED_MANIFEST_PATH = os.path.join(SETUP_RECORDS_DIR, 'generated.json')
 
 
-# Primary static and template files associated to FIRSTAPP 
-FIRSTAPP_URLS_PATH = os.path.join(FIRSTAPP_DIR, "urls.py")
-FIRSTAPP_VIEWS_PATH = os.path.join(FIRSTAPP_DIR, "views.py")
+# Project paths (settings, urls, static and template folders) depend on the settings, see `ScaffoldContext` in 'setup_assets/context.py'
 
-ROOT_STATIC_FOLDER_URL = os.path.join(FIRSTAPP_DIR, 'static')
-ROOT_TEMPLATE_FOLDER_URL = os.path.join(FIRSTAPP_DIR, 'templates')
+
+# Tailwind CSS config
+TAILWIND_CONFIG_FILENAME = 'tailwind.config.js'
 
 
 # JS library urls
@@ -45,6 +52,37 @@ FLOWBITE_FILENAME = 'flowbite.min.js'
 HTMX_FILENAME = 'htmx.min.js'
 ALPINE_FILENAME = 'alpine.min.js'
 
+HTMX_VERSION = '2.0.4'
+
 FLOWBITE_URL = f'node_modules/flowbite/dist/{FLOWBITE_FILENAME}'
-HTMX_URL = f'https://unpkg.com/htmx.org/dist/{HTMX_FILENAME}'
+HTMX_URL = f'https://unpkg.com/htmx.org@{HTMX_VERSION}/dist/{HTMX_FILENAME}'
 ALPINE_URL = f'node_modules/alpinejs/dist/cdn.min.js'
+
+# Tailwind CSS standalone CLI and the library files used instead of the NPM packages with '--standalone-tailwind'
+# The CLI includes Tailwind's own plugins only, so Flowbite's plugin is left out of the project's Tailwind CSS config
+TAILWIND_STANDALONE_VERSION = '3.4.17'
+TAILWIND_STANDALONE_URL = 'https://github.com/tailwindlabs/tailwindcss/releases/download/v{version}/tailwindcss-{target}'
+# Release targets the CLI is downloaded for. Each one is pinned in the lockfile by 'python setup.py lock'
+TAILWIND_STANDALONE_TARGETS = ["linux-x64", "linux-arm64", "macos-x64", "macos-arm64", "windows-x64.exe"]
+
+FLOWBITE_VERSION = '2.5.2'
+ALPINE_VERSION = '3.14.8'
+
+STANDALONE_JS_LIBRARIES = {
+    FLOWBITE_FILENAME: f'https://unpkg.com/flowbite@{FLOWBITE_VERSION}/dist/{FLOWBITE_FILENAME}',
+    f'{FLOWBITE_FILENAME}.map': f'https://unpkg.com/flowbite@{FLOWBITE_VERSION}/dist/{FLOWBITE_FILENAME}.map',
+    ALPINE_FILENAME: f'https://unpkg.com/alpinejs@{ALPINE_VERSION}/dist/cdn.min.js',
+}
+
+# Libraries downloaded into the firstapp static 'js' folder, as {filename: url}. Add an entry to vendor a new library
+JS_LIBRARIES = {
+    HTMX_FILENAME: HTMX_URL,
+}
+
+# Pinned SRI hashes of the downloaded libraries (and the Tailwind CSS standalone CLI), recorded with 'python setup.py lock --only js'. Unpinned downloads are refused
+JS_LIBRARIES_LOCKFILE = os.path.join(SETUP_ROOT_DIR, 'js_libraries.lock.json')
+
+
+# Package lockfiles created with 'python setup.py lock'. When they match the package lists, setups install the pinned versions without resolving them
+PIP_LOCKFILE = os.path.join(SETUP_ROOT_DIR, 'requirements.lock')
+NPM_LOCKFILE = os.path.join(SETUP_ROOT_DIR, 'package-lock.json')
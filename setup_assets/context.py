@@ -0,0 +1,107 @@
+import copy
+import os
+from dataclasses import dataclass, field
+
+from setup_assets import constants
+
+
+def default_settings() -> dict:
+    """Returns a copy of every setting in `config.py` and `setup_assets/constants.py`, by name."""
+    return {name: copy.deepcopy(value) for name, value in vars(constants).items() if name.isupper()}
+
+
+@dataclass
+class ScaffoldContext:
+    """Everything a setup run works from: the project directory, the settings (`config.py` with any overrides) and the command line options. Passed explicitly to each setup function, so projects can be created in-process one after another without reloading any modules.
+
+    Uppercase attributes are read from the `settings`, e.g. `ctx.FIRSTAPP_DIR`. Project paths are worked out from them when used, relative to `project_dir` (see `path()`)."""
+    project_dir: str
+    settings: dict = field(default_factory=default_settings)
+    refresh_cache: bool = False
+    golden_venv: bool = False
+    prod_assets: bool = False
+    settings_profile: str = 'development'
+    offline_mirror: str | None = None
+    standalone_tailwind: bool = False
+    django_worker: object = field(default=None, repr=False)  # Started by the 'django-worker' step
+
+    @classmethod
+    def from_config(cls, project_dir: str, overrides: dict | None = None, **options) -> "ScaffoldContext":
+        """Creates a context for `project_dir` from the `config.py` settings, replacing any in `overrides`."""
+        settings = default_settings()
+        unknown = [name for name in (overrides or {}) if name not in settings]
+        if unknown:
+            raise ValueError(f"Unknown settings: {unknown}.")
+
+        settings.update(copy.deepcopy(overrides or {}))
+        return cls(os.path.abspath(project_dir), settings, **options)
+
+    def __getattr__(self, name: str):
+        # Only called for attributes that aren't fields, so the settings can be read like the old module constants
+        if name.isupper():
+            try:
+                return self.__dict__["settings"][name]
+            except KeyError:
+                pass
+        raise AttributeError(f"'{type(self).__name__}' has no attribute or setting '{name}'")
+
+    def values(self) -> dict:
+        """Returns the settings and options by name, for hashing step inputs."""
+        options = {name: getattr(self, name) for name in ("refresh_cache", "golden_venv", "prod_assets", "settings_profile", "offline_mirror", "standalone_tailwind")}
+        return {**self.settings, **options}
+
+    def path(self, *parts: str) -> str:
+        """Returns the absolute path of `parts` in the project directory."""
+        return os.path.join(self.project_dir, *parts)
+
+    # Project paths, relative to the project directory
+    @property
+    def venv_bin(self) -> str:
+        return self.path(self.VENV)
+
+    @property
+    def settings_path(self) -> str:
+        return os.path.join(self.SETTINGS_DIR, "settings.py")
+
+    @property
+    def urls_path(self) -> str:
+        return os.path.join(self.SETTINGS_DIR, "urls.py")
+
+    @property
+    def asgi_path(self) -> str:
+        return os.path.join(self.SETTINGS_DIR, "asgi.py")
+
+    @property
+    def firstapp_urls_path(self) -> str:
+        return os.path.join(self.FIRSTAPP_DIR, "urls.py")
+
+    @property
+    def firstapp_views_path(self) -> str:
+        return os.path.join(self.FIRSTAPP_DIR, "views.py")
+
+    @property
+    def static_dir(self) -> str:
+        return os.path.join(self.FIRSTAPP_DIR, 'static')
+
+    @property
+    def template_dir(self) -> str:
+        return os.path.join(self.FIRSTAPP_DIR, 'templates')
+
+    @property
+    def base_template_path(self) -> str:
+        return os.path.join(self.template_dir, self.FIRSTAPP_DIR, '_base.html')
+
+    @property
+    def static_root(self) -> str:
+        """Collected static files, matches 'STATIC_ROOT' in the settings. Kept inside the project in `--prod-assets` mode, so projects don't share their hashed and compressed files."""
+        if self.prod_assets:
+            return self.STATIC_ROOT_DIR
+        return os.path.join(os.pardir, self.STATIC_ROOT_DIR)
+
+    @property
+    def tailwind_input_css_path(self) -> str:
+        return os.path.join(self.static_dir, 'css', 'input.css')
+
+    @property
+    def tailwind_output_css_path(self) -> str:
+        return os.path.join(self.static_dir, 'css', 'output.css')
@@ -0,0 +1,304 @@
+"""
+A long-lived Django process that runs inside the project venv. Django is imported once and the setup script sends it management commands over a pipe, one JSON object per line in each direction.
+
+Run directly as a script by the venv's Python, `DjangoWorker` starts and talks to it.
+"""
+import io
+import json
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+
+WORKER_SCRIPT = os.path.abspath(__file__)
+
+# Commands that render project templates. Django configures stub settings for these, so they run in a child process to keep the worker's settings free for the project
+TEMPLATE_COMMANDS = ("startproject", "startapp")
+
+# Seconds a stopped worker has to exit after its stdin closes or it's sent SIGTERM, before it's killed
+KILL_GRACE_S = 5.0
+
+# Seconds between checks for a cancelled run while waiting for a reply
+CANCEL_POLL_S = 0.1
+
+IS_WINDOWS = sys.platform.startswith("win")
+
+
+class DjangoWorker:
+    """Starts a worker with the venv's `python` and sends it commands. Safe to use from multiple threads, commands are run one at a time.
+
+    Like commands started with `run_process()`, a reply is only waited for until the running step's deadline, or until the scheduler cancels the run. The worker (and any child it forked) is then killed, and later commands fail straight away."""
+    def __init__(self, python: str, settings_module: str, cwd: str | None = None, stderr=None) -> None:
+        self.process = subprocess.Popen(
+            [python, WORKER_SCRIPT, settings_module],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr, text=True, bufsize=1, cwd=cwd,
+            start_new_session=not IS_WINDOWS,
+        )
+        self.lock = threading.Lock()
+        self.stopped = None
+
+        # Replies are read in a thread, so waiting for one can be given up on without leaving a read half done
+        self.replies = queue.Queue()
+        threading.Thread(target=self.__read_replies, daemon=True).start()
+
+        ready = self.__read("start")
+        if not ready["ok"]:
+            self.__stop()
+            raise RuntimeError(f"Django worker failed to start: {ready['error']}")
+
+    def __read_replies(self) -> None:
+        for line in self.process.stdout:
+            self.replies.put(line)
+        self.replies.put('')
+
+    def __signal(self, sig: int) -> None:
+        try:
+            if IS_WINDOWS:
+                self.process.terminate()
+            else:
+                os.killpg(self.process.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def __stop(self) -> None:
+        """Stops the worker and the processes it started, killing them if they're still running after `KILL_GRACE_S`."""
+        self.__signal(signal.SIGTERM)
+        try:
+            self.process.wait(KILL_GRACE_S)
+        except subprocess.TimeoutExpired:
+            self.__signal(getattr(signal, "SIGKILL", signal.SIGTERM))
+            self.process.wait()
+
+    def __read(self, command: str) -> dict:
+        """Waits for the worker's next reply, until the running step's deadline or until its run is cancelled. The worker is stopped when either comes first."""
+        # Imported here, as the worker side of this module runs in the project venv without the setup modules
+        from setup_assets.scheduler import current_step_run
+
+        step_run = current_step_run()
+        while True:
+            try:
+                line = self.replies.get(timeout=CANCEL_POLL_S)
+                break
+            except queue.Empty:
+                pass
+
+            if step_run is None:
+                continue
+            if step_run.cancelled.is_set():
+                self.stopped = "was cancelled after another step failed"
+            elif step_run.deadline is not None and step_run.remaining() <= 0:
+                self.stopped = f"timed out at the end of step '{step_run.step.name}'"
+            else:
+                continue
+
+            self.__stop()
+            raise RuntimeError(f"Django command '{command}' {self.stopped}, the worker was stopped.")
+
+        if not line:
+            self.stopped = f"exited with code {self.process.wait()}"
+            raise RuntimeError(f"Django worker exited unexpectedly with code {self.process.returncode}.")
+        return json.loads(line)
+
+    def run_command(self, command: str, *args: str) -> dict:
+        """Runs a command and returns its result: `ok`, `result`, `stdout`, `stderr`, `error`, `duration` (in seconds) and the worker's `rusage` while running it. Raises a `RuntimeError` if the command fails, or if the worker was stopped (see `DjangoWorker`)."""
+        with self.lock:
+            if self.stopped is not None:
+                raise RuntimeError(f"Django command '{command}' can't run, the worker {self.stopped}.")
+
+            self.process.stdin.write(json.dumps({"command": command, "args": list(args)}) + '\n')
+            self.process.stdin.flush()
+            result = self.__read(' '.join([command, *args]))
+
+        result["command"] = ' '.join([command, *args])
+
+        if not result["ok"]:
+            raise RuntimeError(f"Django command '{result['command']}' failed: {result['error']}\n{result['stderr']}")
+        return result
+
+    def secret_key(self) -> str:
+        """Returns a new secret key from `get_random_secret_key()`."""
+        return self.run_command("secret_key")["result"]
+
+    def migration_state(self) -> dict:
+        """Returns what the project's migrated database depends on, see `__migration_state()`."""
+        return self.run_command("migration_state")["result"]
+
+    def close(self) -> None:
+        """Stops the worker. It's given `KILL_GRACE_S` to finish its current command and exit, then it's stopped like a timed out one."""
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.close()
+            except OSError:  # The worker already exited
+                pass
+            try:
+                self.process.wait(KILL_GRACE_S)
+            except subprocess.TimeoutExpired:
+                self.__stop()
+        self.stopped = self.stopped or "was closed"
+
+
+# Worker side, only runs inside the project venv
+def __rusage() -> dict:
+    """Helper function for `__execute()`. Returns the CPU time used by the worker and its children so far, where the platform reports it."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return {}
+
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {"user_cpu_s": own.ru_utime + children.ru_utime, "system_cpu_s": own.ru_stime + children.ru_stime}
+
+
+def __migration_state() -> dict:
+    """Helper function for `__execute()`. Returns what a freshly migrated database depends on: the Django version, the installed apps, the contents of their migration files and the database settings."""
+    import hashlib
+    import django
+    from django.conf import settings
+    from django.db.migrations.loader import MigrationLoader
+
+    # Read from disk only, without connecting to the database
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    migrations = {}
+    for (app_label, name), migration in sorted(loader.disk_migrations.items()):
+        with open(sys.modules[type(migration).__module__].__file__, "rb") as file:
+            migrations[f"{app_label}.{name}"] = hashlib.sha256(file.read()).hexdigest()
+
+    database = settings.DATABASES["default"]
+    return {
+        "django_version": django.get_version(),
+        "installed_apps": list(settings.INSTALLED_APPS),
+        "migrations": migrations,
+        "engine": database["ENGINE"],
+        "options": {key: str(value) for key, value in database.get("OPTIONS", {}).items()},
+    }
+
+
+def __copy_database(source: str | None, target: str | None) -> None:
+    """Helper function for `__execute()`. Copies a SQLite database with its backup API, which includes anything still in its write-ahead log. A `None` path is the project's database, whose connections are closed first so none are left on the replaced file."""
+    import sqlite3
+    from contextlib import closing
+    from django.conf import settings
+    from django.db import connections
+
+    connections.close_all()
+    database = str(settings.DATABASES["default"]["NAME"])
+    with closing(sqlite3.connect(source or database)) as source_db, closing(sqlite3.connect(target or database)) as target_db:
+        source_db.backup(target_db)
+
+
+def __run_template_command(command: str, args: list[str]) -> dict:
+    """Helper function for `__execute()`. Runs a template command in a forked child, or in a separate interpreter where forking isn't available."""
+    if not hasattr(os, "fork"):
+        process = subprocess.run([sys.executable, "-m", "django", command, *args], capture_output=True, text=True)
+        if process.returncode != 0:
+            raise RuntimeError(process.stderr.strip())
+        return {"stdout": process.stdout, "stderr": process.stderr}
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+
+    if pid == 0:
+        os.close(read_fd)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        try:
+            from django.core.management import call_command
+            call_command(command, *args, stdout=stdout, stderr=stderr)
+            output = {"stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+        except Exception as e:
+            output = {"error": f"{type(e).__name__}: {e}", "stderr": stderr.getvalue()}
+
+        with os.fdopen(write_fd, "w") as file:
+            json.dump(output, file)
+        os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd, "r") as file:
+        output = json.loads(file.read() or '{"error": "Child process exited without a result."}')
+    os.waitpid(pid, 0)
+
+    if "error" in output:
+        raise RuntimeError(f"{output['error']}\n{output['stderr']}".strip())
+    return output
+
+
+def __execute(request: dict, setup_django) -> dict:
+    """Helper function for `serve()`. Runs a single command request and returns its result."""
+    from django.core.management import call_command
+
+    command, args = request["command"], request.get("args", [])
+    stdout, stderr = io.StringIO(), io.StringIO()
+    response = {"ok": True, "result": None, "error": None}
+    start_usage = __rusage()
+    start = time.perf_counter()
+
+    try:
+        if command == "secret_key":
+            from django.core.management.utils import get_random_secret_key
+            response["result"] = get_random_secret_key()
+        elif command == "migration_state":
+            setup_django()
+            response["result"] = __migration_state()
+        elif command == "backup_database":
+            setup_django()
+            __copy_database(None, args[0])
+        elif command == "restore_database":
+            setup_django()
+            __copy_database(args[0], None)
+        elif command in TEMPLATE_COMMANDS:
+            output = __run_template_command(command, args)
+            stdout.write(output["stdout"])
+            stderr.write(output["stderr"])
+        else:
+            setup_django()
+            call_command(command, *args, stdout=stdout, stderr=stderr)
+    except Exception as e:
+        response.update(ok=False, error=f"{type(e).__name__}: {e}")
+
+    end_usage = __rusage()
+    response.update(
+        stdout=stdout.getvalue(), stderr=stderr.getvalue(), duration=time.perf_counter() - start,
+        rusage={key: end_usage[key] - start_usage[key] for key in end_usage}
+    )
+    return response
+
+
+def serve(settings_module: str) -> None:
+    """Reads command requests from stdin and writes their results to stdout until stdin closes. Django is set up with the project settings on the first command that needs them."""
+    # Anything else printed to stdout would corrupt the protocol, send it to stderr instead
+    protocol = sys.stdout
+    sys.stdout = sys.stderr
+
+    def reply(response: dict) -> None:
+        protocol.write(json.dumps(response) + '\n')
+        protocol.flush()
+
+    try:
+        import django
+        import django.core.management  # noqa: F401 - preloaded for all commands
+    except ImportError as e:
+        reply({"ok": False, "error": str(e)})
+        return
+
+    sys.path.insert(0, os.getcwd())
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    is_setup = []
+
+    def setup_django() -> None:
+        if not is_setup:
+            django.setup()
+            is_setup.append(True)
+
+    reply({"ok": True, "django_version": django.get_version()})
+
+    for line in sys.stdin:
+        if line.strip():
+            reply(__execute(json.loads(line), setup_django))
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1])
@@ -0,0 +1,171 @@
+import base64
+import hashlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from setup_assets.cache import build_entry, cache_entry_path, entry_lock, touch_entry
+from setup_assets.scheduler import StepRun, current_step_run
+
+
+CHUNK_SIZE = 65536
+
+# Seconds to wait for the server on each read, when the step's deadline doesn't come sooner
+READ_TIMEOUT_S = 30.0
+
+
+def load_lockfile(path: str) -> dict[str, str]:
+    """Returns the pinned SRI hash of each library url in a lockfile, or an empty dict if it doesn't exist yet."""
+    if not os.path.isfile(path):
+        return {}
+
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def save_lockfile(path: str, lock: dict[str, str]) -> None:
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as file:
+        json.dump(dict(sorted(lock.items())), file, indent=2)
+        file.write('\n')
+    os.replace(tmp_path, path)
+
+
+def content_integrity(content: bytes) -> str:
+    """Returns the Subresource Integrity hash of some content, see `file_integrity()`."""
+    return f"sha384-{base64.b64encode(hashlib.sha384(content).digest()).decode('ascii')}"
+
+
+def file_integrity(path: str) -> str:
+    """Returns the Subresource Integrity hash of a file, e.g. `sha384-...`."""
+    digest = hashlib.sha384()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return f"sha384-{base64.b64encode(digest.digest()).decode('ascii')}"
+
+
+def release_target() -> str:
+    """Returns the release name of this OS and architecture, as used for the Tailwind CSS standalone CLI, e.g. `linux-x64` or `windows-x64.exe`."""
+    systems = {"linux": "linux", "darwin": "macos", "win32": "windows"}
+    machines = {"x86_64": "x64", "amd64": "x64", "arm64": "arm64", "aarch64": "arm64"}
+    system = systems.get(sys.platform, sys.platform)
+    machine = machines.get(platform.machine().lower(), platform.machine().lower())
+    return f"{system}-{machine}" + (".exe" if system == "windows" else '')
+
+
+def __check_step(url: str, step_run: StepRun | None) -> None:
+    """Helper function for `__fetch()`. Raises a `RuntimeError` when the step downloading `url` was cancelled or is past its deadline."""
+    if step_run is None:
+        return
+    if step_run.cancelled.is_set():
+        raise RuntimeError(f"Download of '{url}' was cancelled after another step failed.")
+    if step_run.deadline is not None and step_run.remaining() <= 0:
+        raise RuntimeError(f"Download of '{url}' timed out at the end of step '{step_run.step.name}'.")
+
+
+def __stream_to_file(response, path: str, url: str, step_run: StepRun | None) -> None:
+    """Helper function for `__fetch()`. Writes a response body to `path` in chunks, without holding it in memory. The step is checked between chunks, see `__check_step()`."""
+    with open(path, "wb") as file:
+        for chunk in iter(lambda: response.read(CHUNK_SIZE), b''):
+            file.write(chunk)
+            __check_step(url, step_run)
+
+
+def __fetch(url: str, cache_dir: str, expected: str | None, step_run: StepRun | None) -> str:
+    """Helper function for `download_library()`. Returns the path to a cached copy of `url`, downloading it when there's none or the server has a newer one. Cached copies are revalidated with their `ETag`.
+
+    Each read waits at most `READ_TIMEOUT_S`, or until the step's deadline. The download stops when the step is cancelled or reaches its deadline."""
+    entry = cache_entry_path(cache_dir, "downloads", hashlib.sha256(url.encode('utf-8')).hexdigest()[:16])
+    body_path = os.path.join(entry, "body")
+    meta_path = os.path.join(entry, "meta.json")
+
+    with entry_lock(entry):
+        request = urllib.request.Request(url)
+        if os.path.isfile(meta_path) and (expected is None or file_integrity(body_path) == expected):
+            with open(meta_path, "r") as file:
+                etag = json.load(file).get("etag")
+            if etag:
+                request.add_header("If-None-Match", etag)
+
+        __check_step(url, step_run)
+        remaining = step_run.remaining() if step_run is not None else None
+        timeout = READ_TIMEOUT_S if remaining is None else max(min(READ_TIMEOUT_S, remaining), 0.1)
+
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                with build_entry(entry, replace=True) as tmp_dir:
+                    __stream_to_file(response, os.path.join(tmp_dir, "body"), url, step_run)
+                    with open(os.path.join(tmp_dir, "meta.json"), "w") as file:
+                        json.dump({"url": url, "etag": response.headers.get("ETag")}, file)
+        except urllib.error.HTTPError as e:
+            if e.code != 304:
+                raise
+            touch_entry(entry)
+
+    return body_path
+
+
+def download_library(filename: str, url: str, dest_dir: str, cache_dir: str, lock: dict[str, str], mirror_dir: str | None = None, record: bool = False, step_run: StepRun | None = None) -> str:
+    """Fetches a library into `dest_dir`, from the download cache (or a local `mirror_dir` when offline), and checks it against its pinned SRI hash in `lock`. Returns its hash.
+
+    Libraries without a pinned hash are refused, unless `record` is set to accept the downloaded copy (see `lock_libraries()`). The download is bounded by the `step_run` it's for, which defaults to the step running in this thread."""
+    step_run = step_run or current_step_run()
+    expected = lock.get(url)
+    if expected is None and not record:
+        raise ValueError(f"'{url}' has no pinned hash in the JS libraries lockfile. Run 'python setup.py lock --only js' to download and record it, then commit the lockfile.")
+
+    if mirror_dir is not None:
+        source = os.path.join(mirror_dir, filename)
+        if not os.path.isfile(source):
+            raise FileNotFoundError(f"'{filename}' isn't in the offline mirror '{mirror_dir}'.")
+    else:
+        source = __fetch(url, cache_dir, expected, step_run)
+
+    integrity = file_integrity(source)
+    if expected is not None and integrity != expected:
+        raise ValueError(f"Integrity check failed for '{url}': expected '{expected}', got '{integrity}'. Remove its lockfile entry to accept the new version.")
+
+    shutil.copyfile(source, os.path.join(dest_dir, filename))
+    return integrity
+
+
+def download_libraries(libraries: dict[str, str], dest_dir: str, cache_dir: str, lockfile: str, mirror_dir: str | None = None, record: bool = False) -> dict[str, str]:
+    """Fetches every `{filename: url}` library into `dest_dir` concurrently, see `download_library()`. Every library must have a pinned hash in the `lockfile`, unless `record` is set. Returns the hash of each library.
+
+    Without a `lockfile` at all, the libraries are downloaded unchecked and a note is printed, like the package lockfiles fall back to resolving. Nothing is written to it here, see `lock_libraries()`."""
+    lock = load_lockfile(lockfile)
+    if not record and not os.path.isfile(lockfile):
+        print(f"'{os.path.basename(lockfile)}' doesn't exist, downloading the JS libraries without checking their hashes. Run 'python setup.py lock --only js' to pin them.")
+        record = True
+    os.makedirs(dest_dir, exist_ok=True)
+    # The downloads run in their own threads, which don't see the step running in this one
+    step_run = current_step_run()
+
+    def download(filename: str) -> tuple[str, str]:
+        url = libraries[filename]
+        return url, download_library(filename, url, dest_dir, cache_dir, lock, mirror_dir, record, step_run)
+
+    with ThreadPoolExecutor(max_workers=len(libraries) or 1) as pool:
+        hashes = dict(pool.map(download, libraries))
+    return {filename: hashes[url] for filename, url in libraries.items()}
+
+
+def lock_libraries(libraries: dict[str, str], cache_dir: str, lockfile: str) -> int:
+    """Downloads the `{filename: url}` libraries and pins the hashes of the new ones in the `lockfile`. Libraries that are already pinned are still checked against it. Returns the number of new pins.
+
+    The only place new hashes are accepted, so setups (including parallel batch ones) never write to the lockfile."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        hashes = download_libraries(libraries, tmp_dir, cache_dir, lockfile, record=True)
+
+    lock = load_lockfile(lockfile)
+    new = {libraries[filename]: integrity for filename, integrity in hashes.items() if libraries[filename] not in lock}
+    if new:
+        save_lockfile(lockfile, {**lock, **new})
+    return len(new)
@@ -0,0 +1,91 @@
+import difflib
+import os
+import time
+
+from setup_assets.context import ScaffoldContext
+from setup_assets.scaffold import django_templates_entry, generated_files, project_secret_key
+from setup_assets.skeleton import django_skeleton, load_django_templates
+
+
+def __print_tree(root_name: str, files: dict[str, bytes]) -> None:
+    """Helper function for `dry_run()`. Prints the rendered files as a folder tree, with their sizes."""
+    print(f"{root_name}/")
+    printed_dirs = set()
+    for path in sorted(files, key=lambda path: path.split(os.sep)):
+        parts = path.split(os.sep)
+        for depth in range(1, len(parts)):
+            folder = os.sep.join(parts[:depth])
+            if folder not in printed_dirs:
+                printed_dirs.add(folder)
+                print(f"{'  ' * depth}{parts[depth - 1]}/")
+        print(f"{'  ' * len(parts)}{parts[-1]}  ({len(files[path])} B)")
+
+
+def __print_diff(ctx: ScaffoldContext, files: dict[str, bytes]) -> int:
+    """Helper function for `dry_run()`. Prints a unified diff of the rendered files against an existing project, returning the number of files that differ. Files only in the project (such as the venv) are ignored."""
+    changed = 0
+    for path in sorted(files):
+        full_path = ctx.path(path)
+        current = b''
+        if os.path.isfile(full_path):
+            with open(full_path, "rb") as file:
+                current = file.read()
+
+        if current == files[path]:
+            continue
+        changed += 1
+
+        try:
+            diff = difflib.unified_diff(
+                current.decode().splitlines(keepends=True), files[path].decode().splitlines(keepends=True),
+                fromfile=f"a/{path}", tofile=f"b/{path}",
+            )
+        except UnicodeDecodeError:
+            print(f"Binary file '{path}' differs.")
+            continue
+
+        for line in diff:
+            print(line, end='' if line.endswith('\n') else '\n')
+    return changed
+
+
+def render_project(ctx: ScaffoldContext) -> dict[str, bytes]:
+    """Renders every file the setup generates in memory, by path relative to the project: the `startproject` and `startapp` skeleton with the setup's edits applied, and the `setup_assets` layout. Nothing is written and no commands are run."""
+    templates_dir, versions = load_django_templates(django_templates_entry(ctx))
+    skeleton = django_skeleton(templates_dir, versions, ctx.SETTINGS_DIR, ctx.FIRSTAPP_DIR)
+
+    files = {path: content.encode() for path, content in skeleton.items()}
+    files.update(generated_files(ctx, skeleton, project_secret_key(ctx)))
+    return files
+
+
+def compile_errors(files: dict[str, bytes]) -> list[str]:
+    """Compiles the Python files in `files`, returning an error message for each that doesn't compile."""
+    errors = []
+    for path, content in sorted(files.items()):
+        if not path.endswith(".py"):
+            continue
+        try:
+            compile(content, path, "exec")
+        except SyntaxError as e:
+            errors.append(f"{path}:{e.lineno}: {e.msg}")
+    return errors
+
+
+def dry_run(ctx: ScaffoldContext) -> bool:
+    """Renders the project with `render_project()` and prints its folder tree, a diff against the project when it already exists, and any Python files that don't compile. Returns `True` when they all compile."""
+    start = time.perf_counter()
+    files = render_project(ctx)
+    errors = compile_errors(files)
+    duration = time.perf_counter() - start
+
+    __print_tree(os.path.basename(ctx.project_dir), files)
+    if os.path.isdir(ctx.project_dir):
+        print(f"\nChanges to '{ctx.project_dir}':")
+        if not __print_diff(ctx, files):
+            print("None.")
+
+    for error in errors:
+        print(f"SyntaxError: {error}")
+    print(f"\nDry run rendered {len(files)} files in {duration * 1000:.0f}ms, {len(errors)} Python file(s) failed to compile.")
+    return not errors
@@ -0,0 +1,51 @@
+import os
+import shutil
+import sys
+
+
+# Entry point launchers on Windows are '.exe' files with the interpreter path embedded, these can't be safely rewritten
+GOLDEN_VENV_SUPPORTED = not sys.platform.startswith("win")
+VENV_BIN_DIRNAME = "Scripts" if sys.platform.startswith("win") else "bin"
+
+
+def __link_or_copy(src: str, dst: str) -> None:
+    """Helper function for `clone_venv()`. Hardlinks a file, falling back to a copy when linking isn't possible (e.g. across devices)."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def relocate_venv(venv_dir: str, old_path: str, new_path: str) -> None:
+    """Rewrites the absolute `old_path` references in a venv's scripts (shebangs, `activate` files) and `pyvenv.cfg` to `new_path`. Files are replaced rather than edited in place, so hardlinks to a golden venv are never modified."""
+    old, new = os.fsencode(old_path), os.fsencode(new_path)
+    bin_dir = os.path.join(venv_dir, VENV_BIN_DIRNAME)
+
+    paths = [os.path.join(venv_dir, "pyvenv.cfg")]
+    paths += [os.path.join(bin_dir, name) for name in os.listdir(bin_dir)]
+
+    for path in paths:
+        if os.path.islink(path) or not os.path.isfile(path):
+            continue
+
+        with open(path, "rb") as file:
+            content = file.read()
+
+        if old not in content:
+            continue
+
+        tmp_path = f"{path}.relocate"
+        with open(tmp_path, "wb") as file:
+            file.write(content.replace(old, new))
+
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+
+
+def clone_venv(golden_dir: str, target_dir: str) -> None:
+    """Creates a venv at `target_dir` from a golden venv. Files are hardlinked where possible and then relocated to the new path."""
+    golden_dir = os.path.abspath(golden_dir)
+    target_dir = os.path.abspath(target_dir)
+
+    shutil.copytree(golden_dir, target_dir, symlinks=True, copy_function=__link_or_copy)
+    relocate_venv(target_dir, golden_dir, target_dir)
@@ -0,0 +1,255 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from setup_assets.processes import run_process
+
+
+# The instrumentation for the current setup run, see `instrumented()`. A context variable, so setup runs in the same process (such as a batch) each record their own steps
+active: ContextVar["Instrumentation | None"] = ContextVar("instrumentation", default=None)
+
+
+class Instrumentation:
+    """Records every step, external command and Django worker command of a setup run. Events are written as JSON lines to `events_path`, command output goes to a log file per step in `log_dir`, and a summary table is shown live while the steps run."""
+    def __init__(self, step_names: list[str], events_path: str, log_dir: str, cwd: str | None = None) -> None:
+        os.makedirs(os.path.dirname(events_path), exist_ok=True)
+        os.makedirs(log_dir, exist_ok=True)
+
+        self.events = open(events_path, "a")
+        self.log_dir = log_dir
+        self.cwd = cwd or os.getcwd()
+        self.logs = {}
+        self.lock = threading.RLock()
+        self.local = threading.local()
+
+        self.rows = {name: self.__new_row() for name in step_names}
+        self.live = sys.stdout.isatty()
+        self.drawn_lines = 0
+        self.stopped = threading.Event()
+        self.ticker = None
+
+    @staticmethod
+    def __new_row() -> dict:
+        return {"status": "pending", "start": None, "duration": 0.0, "commands": 0, "failed": 0, "stdout": 0, "stderr": 0, "cpu": 0.0}
+
+    # Events and logs
+    def emit(self, event: str, **fields) -> None:
+        """Writes an event to the events file."""
+        with self.lock:
+            self.events.write(json.dumps({"event": event, "time": time.time(), **fields}) + '\n')
+            self.events.flush()
+
+    def log_file(self, name: str):
+        """Returns the (binary) log file for a step or process, opening it on first use."""
+        with self.lock:
+            if name not in self.logs:
+                self.logs[name] = open(os.path.join(self.log_dir, f"{name}.log"), "ab")
+            return self.logs[name]
+
+    def current_step(self) -> str:
+        return getattr(self.local, "step", None) or "setup"
+
+    def __row(self, step: str) -> dict:
+        return self.rows.setdefault(step, self.__new_row())
+
+    # Scheduler listener
+    def step_started(self, step) -> None:
+        self.local.step = step.name
+        with self.lock:
+            row = self.__row(step.name)
+            row.update(status="running", start=time.perf_counter())
+            self.emit("step_started", step=step.name)
+
+            if not self.live and step.message:
+                print(step.message, flush=True)
+            self.render()
+
+    def step_finished(self, step, duration: float, error: Exception | None) -> None:
+        with self.lock:
+            row = self.__row(step.name)
+            row.update(status="failed" if error else "done", duration=duration)
+            self.emit("step_finished", step=step.name, duration_s=duration, ok=error is None, error=str(error) if error else None)
+
+            if not self.live:
+                print(f"  {step.name}: {'Failed' if error else 'Complete'} ({duration:.2f}s)", flush=True)
+            self.render()
+        self.local.step = None
+
+    def steps_skipped(self, step_names: list[str]) -> None:
+        """Marks steps that were already completed by an earlier run."""
+        with self.lock:
+            for name in step_names:
+                self.__row(name)["status"] = "skipped"
+                self.emit("step_skipped", step=name)
+            self.render()
+
+    # Commands
+    def run(self, args: list[str], check: bool = True, stdout=None, timeout: float | None = None, **kwargs) -> int:
+        """Runs an external command, streaming its output into the current step's log. Returns its exit code, see `run_process()`."""
+        step = self.current_step()
+        log = self.log_file(step)
+        with self.lock:
+            log.write(f"$ {' '.join(args)}\n".encode())
+            log.flush()
+
+        def write_log(stream: str, chunk: bytes) -> None:
+            with self.lock:
+                log.write(chunk)
+
+        result = run_process(args, stdout=stdout, on_output=write_log, timeout=timeout, **kwargs)
+
+        with self.lock:
+            if result.reason is not None:
+                log.write(f"[{result.reason}]\n".encode())
+            log.flush()
+
+            row = self.__row(step)
+            row["commands"] += 1
+            row["failed"] += result.returncode != 0 or result.reason is not None
+            row["stdout"] += result.stdout_bytes
+            row["stderr"] += result.stderr_bytes
+            row["cpu"] += result.usage.get("user_cpu_s", 0.0) + result.usage.get("system_cpu_s", 0.0)
+
+            self.emit(
+                "command", step=step, args=list(args), duration_s=result.duration, exit_code=result.returncode, stopped=result.reason,
+                stdout_bytes=result.stdout_bytes if stdout is None else None, stderr_bytes=result.stderr_bytes, **result.usage
+            )
+            self.render()
+
+        result.check(check)
+        return result.returncode
+
+    def record_django_command(self, result: dict) -> None:
+        """Records the result of a Django worker command and writes its output to the current step's log."""
+        step = self.current_step()
+        log = self.log_file(step)
+        stdout, stderr = result["stdout"].encode(), result["stderr"].encode()
+        usage = result.get("rusage") or {}
+
+        with self.lock:
+            log.write(f"$ django {result['command']}\n".encode() + stdout + stderr)
+            log.flush()
+
+            row = self.__row(step)
+            row["commands"] += 1
+            row["failed"] += not result["ok"]
+            row["stdout"] += len(stdout)
+            row["stderr"] += len(stderr)
+            row["cpu"] += usage.get("user_cpu_s", 0.0) + usage.get("system_cpu_s", 0.0)
+
+            self.emit(
+                "django_command", step=step, command=result["command"], ok=result["ok"], duration_s=result["duration"],
+                stdout_bytes=len(stdout), stderr_bytes=len(stderr), **usage
+            )
+            self.render()
+
+    # Summary table
+    def table(self) -> list[str]:
+        """Returns the summary table rows, one per step."""
+        width = max(len(name) for name in self.rows)
+        lines = [f"  {'step':<{width}}  {'status':<7}  {'time':>8}  {'cmds':>4}  {'failed':>6}  {'stdout':>9}  {'stderr':>9}  {'child cpu':>9}"]
+
+        for name, row in self.rows.items():
+            duration = row["duration"]
+            if row["status"] == "running":
+                duration = time.perf_counter() - row["start"]
+
+            lines.append(
+                f"  {name:<{width}}  {row['status']:<7}  {duration:7.2f}s  {row['commands']:>4}  {row['failed']:>6}  "
+                f"{row['stdout'] / 1024:7.1f}KB  {row['stderr'] / 1024:7.1f}KB  {row['cpu']:8.2f}s"
+            )
+        return lines
+
+    def render(self) -> None:
+        """Redraws the live summary table, when the output is a terminal."""
+        if not self.live:
+            return
+
+        with self.lock:
+            lines = self.table()
+            out = f"\x1b[{self.drawn_lines}F" if self.drawn_lines else ''
+            out += ''.join(f"{line}\x1b[K\n" for line in lines)
+            sys.stdout.write(out)
+            sys.stdout.flush()
+            self.drawn_lines = len(lines)
+
+    def __tick(self) -> None:
+        while not self.stopped.wait(0.5):
+            self.render()
+
+    def start(self) -> None:
+        self.emit("run_started", cwd=self.cwd, steps=list(self.rows))
+        if self.live:
+            self.render()
+            self.ticker = threading.Thread(target=self.__tick, daemon=True)
+            self.ticker.start()
+
+    def stop(self, duration: float, ok: bool) -> None:
+        self.stopped.set()
+        if self.ticker is not None:
+            self.ticker.join()
+
+        self.emit("run_finished", duration_s=duration, ok=ok)
+        if self.live:
+            self.render()
+        else:
+            print('\n'.join(self.table()))
+
+        self.events.close()
+        for log in self.logs.values():
+            log.close()
+
+
+@contextmanager
+def instrumented(step_names: list[str], events_path: str, log_dir: str, cwd: str | None = None):
+    """Activates instrumentation for the duration of a setup run in the `cwd` project directory. It's active in the current context, which `run_steps()` passes on to the steps it runs."""
+    instrumentation = Instrumentation(step_names, events_path, log_dir, cwd)
+    instrumentation.start()
+    token = active.set(instrumentation)
+
+    start = time.perf_counter()
+    ok = False
+    try:
+        yield instrumentation
+        ok = True
+    finally:
+        active.reset(token)
+        instrumentation.stop(time.perf_counter() - start, ok)
+
+
+def __write_console(stream: str, chunk: bytes) -> None:
+    """Helper function for `run_command()`. Writes command output to the console."""
+    console = sys.stdout if stream == "stdout" else sys.stderr
+    console.flush()
+    console.buffer.write(chunk)
+    console.buffer.flush()
+
+
+def run_command(args: list[str], check: bool = True, stdout=None, timeout: float | None = None, **kwargs) -> int:
+    """Runs an external command and returns its exit code, raising a `CommandError` if it fails and `check` is on, or if it's stopped. The command is recorded when instrumentation is active, otherwise its output goes straight to the console."""
+    instrumentation = active.get()
+    if instrumentation is not None:
+        return instrumentation.run(args, check=check, stdout=stdout, timeout=timeout, **kwargs)
+
+    result = run_process(args, stdout=stdout, on_output=__write_console, timeout=timeout, **kwargs)
+    result.check(check)
+    return result.returncode
+
+
+def record_django_command(result: dict) -> None:
+    """Records a Django worker command when instrumentation is active, otherwise prints its output."""
+    instrumentation = active.get()
+    if instrumentation is not None:
+        instrumentation.record_django_command(result)
+    elif result["stdout"]:
+        print(result["stdout"], end='')
+
+
+def process_log(name: str):
+    """Returns a log file for a long running process when instrumentation is active, otherwise `None`."""
+    instrumentation = active.get()
+    return instrumentation.log_file(name) if instrumentation is not None else None
@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+from setup_assets.cache import files_key
+from setup_assets.scheduler import Step, required_steps
+
+
+def step_input_hash(step: Step, namespace: dict) -> str:
+    """Returns a hash of a step's inputs: the values of its `inputs` settings (looked up in `namespace`) and the files in its `input_paths`."""
+    settings = {name: namespace[name] for name in step.inputs}
+    return files_key(*step.input_paths, extra={"step": step.name, "settings": settings})
+
+
+def plan_resume(steps: list[Step], entries: dict, hashes: dict[str, str]) -> list[str]:
+    """Returns the names of the steps to rerun, in declaration order. These are the steps that never finished or whose inputs changed, plus:
+    - the steps that depend on them
+    - the steps that created anything they modify in place, as their edits can't be applied twice
+    - the non-resumable steps (e.g. running processes) any of them need"""
+    providers = {resource: step for step in steps for resource in step.provides}
+    resumable = {step.name for step in steps if step.resumable}
+    to_run = {
+        step.name for step in steps
+        if step.name in resumable and entries.get(step.name, {}).get("input_hash") != hashes[step.name]
+    }
+
+    changed = True
+    while changed:
+        changed = False
+        for step in steps:
+            if step.name in to_run:
+                rerun = {providers[resource].name for resource in step.modifies}
+            elif any(providers[resource].name in to_run for resource in step.needs):
+                rerun = {step.name}
+            else:
+                continue
+
+            if not rerun <= to_run:
+                to_run |= rerun
+                changed = True
+
+    to_run |= set(required_steps(steps, list(to_run))) - resumable
+    return [step.name for step in steps if step.name in to_run]
+
+
+def remove_outputs(step: Step, root: str) -> None:
+    """Removes the files and folders a step creates in `root`, so it can run again from a clean state."""
+    for output in step.outputs:
+        path = os.path.join(root, output)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        elif os.path.lexists(path):
+            os.remove(path)
+
+
+class Journal:
+    """A checkpoint journal of finished steps and the hash of their inputs, saved to `path` after every change. Acts as a scheduler listener, so steps are removed when they start and recorded when they finish."""
+    def __init__(self, path: str, hashes: dict[str, str], fresh: bool = False) -> None:
+        self.path = path
+        self.hashes = hashes
+        self.lock = threading.Lock()
+        self.entries = {}
+
+        if not fresh and os.path.exists(path):
+            with open(path, "r") as file:
+                self.entries = json.load(file).get("steps", {})
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"steps": self.entries}, file, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def step_started(self, step: Step) -> None:
+        with self.lock:
+            self.entries.pop(step.name, None)
+            self.save()
+
+    def step_finished(self, step: Step, duration: float, error: Exception | None) -> None:
+        if error is not None or not step.resumable:
+            return
+
+        with self.lock:
+            self.entries[step.name] = {"input_hash": self.hashes[step.name], "finished": time.time(), "duration_s": duration}
+            self.save()
@@ -0,0 +1,173 @@
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from setup_assets.cache import package_set_key
+from setup_assets.downloads import lock_libraries, release_target
+from setup_assets.instrument import run_command
+
+
+# Every release file of a package version is listed here, so the lockfile also has the hashes of the wheels for other platforms
+PYPI_JSON_URL = "https://pypi.org/pypi/{name}/{version}/json"
+
+PIP_LOCK_KEY_PREFIX = "# packages: "
+
+
+def __canonical_name(name: str) -> str:
+    """Helper function for `resolve_pip_lock()`. Returns a package name in its normalized form, e.g. `django-compressor` for `django_compressor`."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def __npm_name(spec: str) -> str:
+    """Helper function for `load_npm_lock()`. Returns the package name of an npm spec, e.g. `tailwindcss` for `tailwindcss@3` or `@scope/name` for `@scope/name@1`."""
+    scope = '@' if spec.startswith('@') else ''
+    return scope + spec[len(scope):].split('@', 1)[0]
+
+
+def __pypi_hashes(name: str, version: str) -> set[str]:
+    """Helper function for `resolve_pip_lock()`. Returns the sha256 hashes of every release file of a package version on PyPI, or an empty set when they can't be fetched."""
+    try:
+        with urllib.request.urlopen(PYPI_JSON_URL.format(name=name, version=version), timeout=30) as response:
+            release = json.load(response)
+    except (urllib.error.URLError, OSError, ValueError):
+        return set()
+
+    return {file["digests"]["sha256"] for file in release.get("urls", []) if "sha256" in file.get("digests", {})}
+
+
+def pip_lock_key(packages: list[str]) -> str:
+    """Returns the key a pip lockfile is stored with, a hash of the packages it was resolved from."""
+    return package_set_key(packages, platform_specific=False)
+
+
+def pip_lock_matches(path: str, packages: list[str]) -> bool:
+    """Returns `True` when the pip lockfile at `path` exists and was resolved from `packages`. Prints a note when it's out of date."""
+    if not os.path.isfile(path):
+        return False
+
+    with open(path, "r") as file:
+        keys = [line[len(PIP_LOCK_KEY_PREFIX):].strip() for line in file if line.startswith(PIP_LOCK_KEY_PREFIX)]
+
+    if keys == [pip_lock_key(packages)]:
+        return True
+
+    print(f"'{os.path.basename(path)}' doesn't match 'PIP_PACKAGES', resolving them instead. Run 'python setup.py lock' to update it.")
+    return False
+
+
+def resolve_pip_lock(python: str, packages: list[str], path: str) -> list[str]:
+    """Resolves `packages` (and their dependencies) with `python`'s pip, and writes them to the lockfile at `path` as pinned requirements with their hashes. Returns the pinned requirements.
+
+    The dependencies are resolved for the Python version and platform `python` runs on, the hashes cover every release file on PyPI."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report_path = os.path.join(tmp_dir, "report.json")
+        run_command([python, "-m", "pip", "install", "--dry-run", "--ignore-installed", "--quiet", "--report", report_path, *packages])
+
+        with open(report_path, "r") as file:
+            report = json.load(file)
+
+    pins = {}
+    for item in report["install"]:
+        name, version = __canonical_name(item["metadata"]["name"]), item["metadata"]["version"]
+        resolved = item["download_info"].get("archive_info", {}).get("hashes", {}).get("sha256")
+        pins[name] = (version, {resolved} if resolved else set())
+
+    with ThreadPoolExecutor(max_workers=len(pins) or 1) as pool:
+        release_hashes = dict(zip(pins, pool.map(lambda name: __pypi_hashes(name, pins[name][0]), pins)))
+
+    lines = [
+        "# Generated by 'python setup.py lock' from 'PIP_PACKAGES', don't edit it by hand",
+        f"# Resolved with {sys.implementation.cache_tag} on {sys.platform} {platform.machine()}",
+        f"{PIP_LOCK_KEY_PREFIX}{pip_lock_key(packages)}",
+    ]
+    requirements = []
+    for name, (version, hashes) in sorted(pins.items()):
+        hashes = sorted(hashes | release_hashes[name])
+        if not hashes:
+            raise ValueError(f"Couldn't find a hash for '{name}=={version}'.")
+
+        requirements.append(f"{name}=={version}")
+        lines.append(f"{name}=={version} \\\n" + " \\\n".join(f"    --hash=sha256:{digest}" for digest in hashes))
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as file:
+        file.write('\n'.join(lines) + '\n')
+    os.replace(tmp_path, path)
+    return requirements
+
+
+def load_npm_lock(path: str, dev_packages: list[str], packages: list[str]) -> dict | None:
+    """Returns the npm lockfile at `path` when it was resolved from `dev_packages` and `packages`, otherwise `None`. Prints a note when it's out of date."""
+    if not os.path.isfile(path):
+        return None
+
+    with open(path, "r") as file:
+        lock = json.load(file)
+
+    root = lock.get("packages", {}).get("", {})
+    locked = (sorted(root.get("devDependencies", {})), sorted(root.get("dependencies", {})))
+    if locked == (sorted(map(__npm_name, dev_packages)), sorted(map(__npm_name, packages))):
+        return lock
+
+    print(f"'{os.path.basename(path)}' doesn't match the NPM packages, resolving them instead. Run 'python setup.py lock' to update it.")
+    return None
+
+
+def write_npm_project(lock: dict, project_dir: str) -> None:
+    """Writes a `package.json` and `package-lock.json` for `project_dir` from an npm lockfile, so `npm ci` installs exactly the locked packages."""
+    root = lock["packages"][""]
+    package = {name: root[name] for name in ("devDependencies", "dependencies") if name in root}
+
+    # Named after the project folder, as 'npm install' would
+    name = os.path.basename(os.path.abspath(project_dir))
+    lock = {**lock, "name": name, "packages": {**lock["packages"], "": {**root, "name": name}}}
+
+    for filename, content in (("package.json", package), ("package-lock.json", lock)):
+        with open(os.path.join(project_dir, filename), "w") as file:
+            json.dump(content, file, indent=2)
+            file.write('\n')
+
+
+def resolve_npm_lock(dev_packages: list[str], packages: list[str], path: str) -> None:
+    """Resolves `dev_packages` and `packages` into the npm lockfile at `path`, without installing them."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        run_command(["npm", "install", "--package-lock-only", "-D", *dev_packages], cwd=tmp_dir)
+        run_command(["npm", "install", "--package-lock-only", *packages], cwd=tmp_dir)
+        shutil.copyfile(os.path.join(tmp_dir, "package-lock.json"), f"{path}.tmp-{os.getpid()}")
+
+    os.replace(f"{path}.tmp-{os.getpid()}", path)
+
+
+def lock_packages(only: str | None = None, all_targets: bool = False) -> None:
+    """Resolves the `PIP_PACKAGES` into `PIP_LOCKFILE` and the NPM packages into `NPM_LOCKFILE`, and pins the hashes of the downloaded JS libraries (and the Tailwind CSS standalone CLI) in `JS_LIBRARIES_LOCKFILE`. `only` limits it to 'pip', 'npm' or 'js'.
+
+    The CLI is only pinned for this platform, unless `all_targets` is set to pin every one of the `TAILWIND_STANDALONE_TARGETS`."""
+    from setup_assets import constants
+
+    if only in (None, "pip"):
+        print("Resolving pip packages...")
+        requirements = resolve_pip_lock(sys.executable, constants.PIP_PACKAGES, constants.PIP_LOCKFILE)
+        print(f"Locked {len(requirements)} pip packages in '{constants.PIP_LOCKFILE}'.\n")
+
+    if only in (None, "npm"):
+        print("Resolving NPM packages...")
+        resolve_npm_lock(constants.NPM_DEV_PACKAGES, constants.NPM_PACKAGES, constants.NPM_LOCKFILE)
+        print(f"Locked the NPM packages in '{constants.NPM_LOCKFILE}'.\n")
+
+    if only in (None, "js"):
+        print("Downloading JS libraries...")
+        targets = constants.TAILWIND_STANDALONE_TARGETS if all_targets else [target for target in constants.TAILWIND_STANDALONE_TARGETS if target == release_target()]
+        tailwind_clis = {
+            f"tailwindcss-{target}": constants.TAILWIND_STANDALONE_URL.format(version=constants.TAILWIND_STANDALONE_VERSION, target=target)
+            for target in targets
+        }
+        libraries = {**constants.JS_LIBRARIES, **constants.STANDALONE_JS_LIBRARIES, **tailwind_clis}
+        pinned = lock_libraries(libraries, constants.CACHE_DIR, constants.JS_LIBRARIES_LOCKFILE)
+        print(f"Pinned {pinned} new JS libraries in '{constants.JS_LIBRARIES_LOCKFILE}', {len(libraries) - pinned} matched their existing pins.\n")
@@ -0,0 +1,137 @@
+import json
+import os
+import shutil
+from difflib import SequenceMatcher
+
+
+def merge_lines(base: list[str], current: list[str], desired: list[str]) -> list[str] | None:
+    """Applies the changes between `base` and `desired` to `current`, keeping any edits made in `current`. Returns `None` when a change overlaps one of those edits."""
+    if current == base or current == desired:
+        return desired
+    if desired == base:
+        return current
+
+    # Where each line of `base` is in `current`, for the lines left unedited
+    in_current = {}
+    for base_start, current_start, size in SequenceMatcher(None, base, current, autojunk=False).get_matching_blocks():
+        for offset in range(size):
+            in_current[base_start + offset] = current_start + offset
+
+    edits = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, base, desired, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            continue
+
+        if i1 == i2:
+            # Inserted lines go after the line before them, or before the line after them
+            if i1 == 0:
+                start = 0
+            elif i1 - 1 in in_current:
+                start = in_current[i1 - 1] + 1
+            elif i1 in in_current:
+                start = in_current[i1]
+            else:
+                return None
+            end = start
+        else:
+            # Replaced or removed lines must still be in `current`, unedited and in one piece
+            start = in_current.get(i1)
+            if start is None or any(in_current.get(i) != start + i - i1 for i in range(i1, i2)):
+                return None
+            end = start + i2 - i1
+
+        if edits and start < edits[-1][1]:
+            return None
+        edits.append((start, end, desired[j1:j2]))
+
+    merged = list(current)
+    for start, end, lines in reversed(edits):
+        merged[start:end] = lines
+    return merged
+
+
+def merge_content(base: bytes | None, current: bytes | None, desired: bytes | None) -> tuple[bytes | None, bool]:
+    """Merges a generated file, see `merge_lines()`. `None` is a missing file: a file the user removed stays removed, and a file that's no longer generated is only removed if it's unedited. Returns the merged content and whether it conflicted (in which case `current` is returned)."""
+    if current == desired or desired == base:
+        return current, False
+    if current == base:
+        return desired, False
+    if base is None or current is None or desired is None:
+        return current, current is not None and base is None
+
+    try:
+        merged = merge_lines(*[content.decode().splitlines(keepends=True) for content in (base, current, desired)])
+    except UnicodeDecodeError:
+        merged = None
+
+    if merged is None:
+        return current, True
+    return ''.join(merged).encode(), False
+
+
+def __read(path: str) -> bytes | None:
+    """Helper function for `merge_files()`. Returns the contents of a file, or `None` if it doesn't exist."""
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def __write(path: str, content: bytes | None) -> None:
+    """Helper function for `merge_files()` and `record_files()`. Replaces a file (or removes it for `None`) rather than writing in place, as it may be hardlinked to 'setup_assets'."""
+    if content is None:
+        if os.path.isfile(path):
+            os.remove(path)
+        return
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as file:
+        file.write(content)
+    if os.path.isfile(path):
+        shutil.copymode(path, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def merge_files(root: str, records_dir: str, desired: dict[str, bytes]) -> dict[str, str]:
+    """Merges the `desired` contents of the generated files (by path relative to `root`) into `root`, along with the files recorded in `records_dir` that are no longer generated. The records hold what was last generated, they're updated for every file that merged without a conflict.
+
+    Returns the outcome for each file that changed or conflicted: 'created', 'updated', 'removed' or 'conflict'."""
+    recorded = [
+        os.path.relpath(os.path.join(dirpath, name), records_dir)
+        for dirpath, _, names in os.walk(records_dir) for name in names
+    ]
+
+    outcomes = {}
+    for path in sorted(set(desired) | set(recorded)):
+        base, current = __read(os.path.join(records_dir, path)), __read(os.path.join(root, path))
+        merged, conflict = merge_content(base, current, desired.get(path))
+
+        if conflict:
+            outcomes[path] = 'conflict'
+            continue
+
+        if merged != current:
+            __write(os.path.join(root, path), merged)
+            outcomes[path] = 'created' if current is None else 'removed' if merged is None else 'updated'
+        __write(os.path.join(records_dir, path), desired.get(path))
+
+    return outcomes
+
+
+def record_files(root: str, records_dir: str, paths: list[str], manifest: dict, manifest_path: str) -> None:
+    """Records the current contents of the generated files at `paths` (relative to `root`) in `records_dir`, along with a JSON `manifest` of how they were generated."""
+    shutil.rmtree(records_dir, ignore_errors=True)
+    for path in paths:
+        __write(os.path.join(records_dir, path), __read(os.path.join(root, path)))
+
+    with open(manifest_path, "w") as file:
+        json.dump(manifest, file, indent=2, default=str)
+
+
+def load_manifest(manifest_path: str) -> dict | None:
+    """Returns the manifest saved by `record_files()`, or `None` if there isn't one."""
+    if not os.path.isfile(manifest_path):
+        return None
+    with open(manifest_path, "r") as file:
+        return json.load(file)
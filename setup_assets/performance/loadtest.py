@@ -0,0 +1,135 @@
+"""
+Load test for the project. Sends concurrent requests to a running server (or to Django's test client, in-process) and reports the throughput and latency. Also checks which of the production profile's tuned settings are active.
+
+    python loadtest.py --check
+    python loadtest.py http://127.0.0.1:8000/ --requests 2000 --concurrency 32
+    python loadtest.py / --client --requests 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+
+SETTINGS_MODULE = "config.settings"
+
+
+def setup_django() -> None:
+    """Loads the project settings, so Django can be used from this script."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", SETTINGS_MODULE)
+
+    import django
+    django.setup()
+
+
+def check_settings() -> None:
+    """Prints the settings tuned by the production profile, as Django sees them."""
+    setup_django()
+
+    from django.conf import settings
+    from django.db import connection
+
+    database = settings.DATABASES["default"]
+    checks = {
+        "DEBUG": settings.DEBUG,
+        "CONN_MAX_AGE": database.get("CONN_MAX_AGE"),
+        "CONN_HEALTH_CHECKS": database.get("CONN_HEALTH_CHECKS"),
+        "CACHES backend": settings.CACHES["default"]["BACKEND"],
+        "SESSION_ENGINE": settings.SESSION_ENGINE,
+        "Template loaders": settings.TEMPLATES[0]["OPTIONS"].get("loaders", "Django defaults"),
+    }
+
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            for pragma in ("journal_mode", "synchronous", "busy_timeout"):
+                cursor.execute(f"PRAGMA {pragma}")
+                checks[f"SQLite {pragma}"] = cursor.fetchone()[0]
+
+    for name, value in checks.items():
+        print(f"{name:<20} {value}")
+
+
+def fetch(url: str, timeout: float) -> tuple[float, bool]:
+    """Sends a single request, returning its latency in seconds and whether it succeeded."""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            ok = response.status < 400
+    except Exception:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def client_fetcher() -> Callable[[str, float], tuple[float, bool]]:
+    """Returns a `fetch()` that sends requests through Django's test client instead of the network, with a client per thread. The timeout is ignored."""
+    setup_django()
+
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    # Allows the test client's 'testserver' host
+    setup_test_environment()
+    local = threading.local()
+
+    def fetch_with_client(path: str, timeout: float) -> tuple[float, bool]:
+        if not hasattr(local, "client"):
+            local.client = Client()
+
+        start = time.perf_counter()
+        try:
+            ok = local.client.get(path).status_code < 400
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    return fetch_with_client
+
+
+def run_load_test(url: str, requests: int, concurrency: int, timeout: float, fetch: Callable[[str, float], tuple[float, bool]] = fetch) -> bool:
+    """Sends `requests` requests to `url`, `concurrency` at a time, and prints a summary. Returns `True` if every request succeeded."""
+    # Warm up connections, caches and the template loader first
+    for _ in range(min(concurrency, requests)):
+        fetch(url, timeout)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: fetch(url, timeout), range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, ok in results if ok)
+    failures = len(results) - len(latencies)
+    print(f"{requests} requests to {url} with {concurrency} at a time in {elapsed:.2f}s")
+    print(f"  throughput: {requests / elapsed:.1f} req/s, failures: {failures}")
+
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        print(f"  latency: p50 {cuts[49] * 1000:.1f}ms, p95 {cuts[94] * 1000:.1f}ms, p99 {cuts[98] * 1000:.1f}ms, max {latencies[-1] * 1000:.1f}ms")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test a running server or the test client, or check the production settings.")
+    parser.add_argument("url", nargs="?", help="URL to request, or a path with '--client'. Defaults to 'http://127.0.0.1:8000/' ('/' with '--client').")
+    parser.add_argument("--client", action="store_true", help="Send the requests through Django's test client, without a running server.")
+    parser.add_argument("--requests", type=int, default=1000, help="Total number of requests. Defaults to 1000.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Number of requests sent at the same time. Defaults to 16.")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Seconds to wait for each response. Defaults to 10.")
+    parser.add_argument("--check", action="store_true", help="Print the tuned settings instead of running a load test.")
+    args = parser.parse_args()
+
+    if args.check:
+        check_settings()
+        sys.exit()
+
+    if args.client:
+        ok = run_load_test(args.url or "/", args.requests, args.concurrency, args.timeout, client_fetcher())
+    else:
+        ok = run_load_test(args.url or "http://127.0.0.1:8000/", args.requests, args.concurrency, args.timeout)
+    sys.exit(0 if ok else 1)
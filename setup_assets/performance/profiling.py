@@ -0,0 +1,78 @@
+"""
+Per-request profiling for development. Turned on with PROFILE_REQUESTS=True in '.env', and never used with DEBUG off.
+
+Every response gets a 'Server-Timing' header with its total and SQL time (shown in the browser's network panel), and slow requests are logged with their query count. Add '?profile' to a URL to see its cProfile stats instead of the page.
+"""
+import cProfile
+import io
+import logging
+import pstats
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+
+
+logger = logging.getLogger(__name__)
+
+# Requests slower than this are logged
+SLOW_REQUEST_MS = 200
+
+# Number of functions shown for '?profile', by cumulative time
+PROFILE_LIMIT = 40
+
+
+class QueryTimer:
+    """A database execute wrapper that counts the queries run and their total time."""
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class ProfilingMiddleware:
+    """Times each request and its SQL queries, and profiles it with cProfile when '?profile' is in the URL."""
+    def __init__(self, get_response) -> None:
+        if not (settings.DEBUG and getattr(settings, "PROFILE_REQUESTS", False)):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        profiler = cProfile.Profile() if "profile" in request.GET else None
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+
+            if profiler is not None:
+                profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+
+        total_ms = (time.perf_counter() - start) * 1000
+        sql_ms = timer.duration * 1000
+
+        if profiler is not None:
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(PROFILE_LIMIT)
+            response = HttpResponse(stream.getvalue(), content_type="text/plain")
+
+        response["Server-Timing"] = f'total;dur={total_ms:.1f}, sql;dur={sql_ms:.1f};desc="{timer.count} queries"'
+        if total_ms >= SLOW_REQUEST_MS:
+            logger.warning("Slow request: %s %s took %.1fms, %d queries took %.1fms", request.method, request.path, total_ms, timer.count, sql_ms)
+        return response
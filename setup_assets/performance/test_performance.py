@@ -0,0 +1,61 @@
+"""
+Performance budgets for the app's pages. Each named URL in 'urls.py' that takes no arguments is requested with the test client, and must stay within its query and response time budgets.
+
+    python manage.py test
+
+Set a page's budget in BUDGETS by URL name, the rest use DEFAULT_BUDGET. Budgets are upper limits. Response times are the median of several requests after a warm-up, so they're stable enough to run on every change.
+"""
+import statistics
+import time
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from . import urls
+
+
+DEFAULT_BUDGET = {"queries": 10, "ms": 250}
+BUDGETS = {
+    "home": {"queries": 0, "ms": 100},
+}
+
+# Requests timed per page, after one warm-up request
+TIMED_REQUESTS = 5
+
+
+def budget_urls() -> list[tuple[str, str]]:
+    """Returns the `(name, url)` of each named URL in 'urls.py' that takes no arguments."""
+    namespace = getattr(urls, "app_name", None)
+    return [
+        (pattern.name, reverse(f"{namespace}:{pattern.name}" if namespace else pattern.name))
+        for pattern in urls.urlpatterns
+        if isinstance(pattern, URLPattern) and pattern.name and not pattern.pattern.regex.groups
+    ]
+
+
+class PerformanceBudgetTests(TestCase):
+    def test_pages_within_budget(self):
+        for name, url in budget_urls():
+            budget = {**DEFAULT_BUDGET, **BUDGETS.get(name, {})}
+
+            with self.subTest(url=url):
+                # Warms up the template loader and caches
+                self.client.get(url)
+
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertLess(response.status_code, 400)
+
+                executed = '\n'.join(query["sql"] for query in queries.captured_queries)
+                self.assertLessEqual(len(queries), budget["queries"], f"'{url}' ran {len(queries)} queries, over its budget of {budget['queries']}:\n{executed}")
+
+                timings = []
+                for _ in range(TIMED_REQUESTS):
+                    start = time.perf_counter()
+                    self.client.get(url)
+                    timings.append(time.perf_counter() - start)
+
+                median_ms = statistics.median(timings) * 1000
+                self.assertLessEqual(median_ms, budget["ms"], f"'{url}' took {median_ms:.1f}ms, over its budget of {budget['ms']}ms.")
@@ -0,0 +1,45 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:  # Optional, only '.gz' files are created without it
+    brotli = None
+
+
+# Formats that are already compressed gain nothing from another pass
+SKIP_EXTENSIONS = (".gz", ".br", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".ico", ".woff", ".woff2", ".zip")
+
+# Smaller files cost more in headers and decompression than they save
+MIN_SIZE_BYTES = 256
+
+
+def __compress_file(path: str) -> list[str]:
+    """Helper function for `precompress_dir()`. Writes the compressed siblings of a file, keeping only the ones that are smaller than the original. Returns their paths."""
+    with open(path, "rb") as file:
+        data = file.read()
+
+    variants = {".gz": lambda content: gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = lambda content: brotli.compress(content, quality=11)
+
+    created = []
+    for extension, compress in variants.items():
+        compressed = compress(data)
+        if len(compressed) < len(data):
+            with open(path + extension, "wb") as file:
+                file.write(compressed)
+            created.append(path + extension)
+    return created
+
+
+def precompress_dir(root: str, max_workers: int | None = None) -> list[str]:
+    """Creates `.gz` (and `.br`, when the `brotli` package is installed) siblings for every compressible file in `root`, in parallel. Returns the paths of the created files."""
+    paths = [
+        os.path.join(folder, name) for folder, _, files in os.walk(root) for name in files
+        if not name.lower().endswith(SKIP_EXTENSIONS) and os.path.getsize(os.path.join(folder, name)) >= MIN_SIZE_BYTES
+    ]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return [path for created in pool.map(__compress_file, paths) for path in created]
@@ -0,0 +1,203 @@
+import asyncio
+import math
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable
+
+from setup_assets.scheduler import current_step_run
+
+
+CHUNK_SIZE = 65536
+
+# End of a command's output kept in memory for error messages, the full output only goes to the logs
+TAIL_BYTES = 16384
+
+# Seconds a stopped command has to exit after SIGTERM, before it's killed
+KILL_GRACE_S = 5.0
+
+# Seconds between checks for a cancelled run
+CANCEL_POLL_S = 0.1
+
+IS_WINDOWS = sys.platform.startswith("win")
+
+
+class OutputTail:
+    """A ring buffer holding the last `max_bytes` of a command's output, so memory stays bounded however much it prints."""
+    def __init__(self, max_bytes: int = TAIL_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.chunks = deque()
+        self.size = 0
+        self.total = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.total += len(chunk)
+        chunk = chunk[-self.max_bytes:]
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+
+        # Drop whole chunks while the rest still fills the buffer
+        while self.size - len(self.chunks[0]) >= self.max_bytes:
+            self.size -= len(self.chunks.popleft())
+
+    def text(self) -> str:
+        data = b''.join(self.chunks)[-self.max_bytes:]
+        prefix = "[...]\n" if self.total > len(data) else ''
+        return prefix + data.decode(errors="replace")
+
+
+class CommandError(subprocess.CalledProcessError):
+    """Raised when a command fails, times out or is cancelled. The message ends with the last of its output."""
+    def __init__(self, returncode: int, cmd: list[str], output: str, reason: str | None = None) -> None:
+        super().__init__(returncode, cmd, output=output)
+        self.reason = reason
+
+    def __str__(self) -> str:
+        summary = f"Command '{' '.join(self.cmd)}' {self.reason or f'returned non-zero exit status {self.returncode}'}."
+        output = self.output.strip()
+        return f"{summary}\n{output}" if output else summary
+
+
+@dataclass
+class ProcessResult:
+    """The outcome of a command. `reason` is set when it was stopped before finishing (timed out or cancelled)."""
+    args: list[str]
+    returncode: int
+    duration: float
+    stdout_bytes: int = 0
+    stderr_bytes: int = 0
+    usage: dict = field(default_factory=dict)
+    tail: OutputTail = field(default_factory=OutputTail)
+    reason: str | None = None
+
+    def check(self, check: bool = True) -> None:
+        """Raises a `CommandError` if the command was stopped, or if it failed and `check` is on."""
+        if self.reason is not None or (check and self.returncode != 0):
+            raise CommandError(self.returncode, self.args, self.tail.text(), self.reason)
+
+
+def __wait(process: subprocess.Popen) -> dict:
+    """Helper function for `__run()`. Waits for a process and returns its resource usage, where the platform reports it."""
+    if not hasattr(os, "wait4"):
+        process.wait()
+        return {}
+
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    # macOS reports bytes, Linux reports KB
+    max_rss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return {"user_cpu_s": usage.ru_utime, "system_cpu_s": usage.ru_stime, "max_rss_kb": max_rss}
+
+
+async def __pump(pipe, write: Callable[[bytes], None]) -> int:
+    """Helper function for `__run()`. Passes a pipe's output to `write` as it arrives, returning the number of bytes read."""
+    loop = asyncio.get_running_loop()
+
+    if IS_WINDOWS:
+        # The event loop can't wait on anonymous pipes on Windows, so each read waits in a worker thread instead
+        def read():
+            return loop.run_in_executor(None, os.read, pipe.fileno(), CHUNK_SIZE)
+    else:
+        reader = asyncio.StreamReader(limit=CHUNK_SIZE)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+
+        def read():
+            return reader.read(CHUNK_SIZE)
+
+    total = 0
+    while chunk := await read():
+        write(chunk)
+        total += len(chunk)
+
+    pipe.close()
+    return total
+
+
+def __signal(process: subprocess.Popen, sig: int) -> None:
+    """Helper function for `__stop()`. Signals a process and everything it started, as pip and npm run their own child processes."""
+    try:
+        if IS_WINDOWS:
+            process.terminate()
+        else:
+            os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def __stop(process: subprocess.Popen, finished: asyncio.Future) -> None:
+    """Helper function for `__run()`. Asks a process to stop, then kills it if it's still running after `KILL_GRACE_S`."""
+    __signal(process, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(asyncio.shield(finished), KILL_GRACE_S)
+    except asyncio.TimeoutError:
+        __signal(process, getattr(signal, "SIGKILL", signal.SIGTERM))
+        await finished
+
+
+async def __run(args: list[str], stdout, on_output: Callable[[str, bytes], None] | None, timeout: float | None, cancelled, **kwargs) -> ProcessResult:
+    """Helper function for `run_process()`."""
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    result = ProcessResult(list(args), 0, 0.0)
+
+    # Resolved here, so '.cmd' launchers (npm, npx) run on Windows without a shell
+    executable = shutil.which(args[0], path=(kwargs.get("env") or os.environ).get("PATH")) or args[0]
+    if not IS_WINDOWS:
+        kwargs["start_new_session"] = True
+    process = subprocess.Popen([executable, *args[1:]], stdout=subprocess.PIPE if stdout is None else stdout, stderr=subprocess.PIPE, **kwargs)
+
+    def writer(stream: str) -> Callable[[bytes], None]:
+        def write(chunk: bytes) -> None:
+            result.tail.write(chunk)
+            if on_output is not None:
+                on_output(stream, chunk)
+        return write
+
+    pumps = [__pump(process.stderr, writer("stderr"))]
+    if stdout is None:
+        pumps.append(__pump(process.stdout, writer("stdout")))
+    finished = asyncio.gather(loop.run_in_executor(None, __wait, process), *pumps)
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while not finished.done():
+        await asyncio.wait({finished}, timeout=CANCEL_POLL_S)
+
+        if finished.done():
+            break
+        if cancelled is not None and cancelled.is_set():
+            result.reason = "was cancelled after another step failed"
+        elif deadline is not None and time.monotonic() >= deadline:
+            result.reason = f"timed out after {timeout:.0f}s"
+        else:
+            continue
+
+        await __stop(process, finished)
+
+    usage, *counts = finished.result()
+    result.returncode = process.returncode
+    result.duration = time.perf_counter() - start
+    result.usage = usage
+    result.stderr_bytes = counts[0]
+    result.stdout_bytes = counts[1] if stdout is None else 0
+    return result
+
+
+def run_process(args: list[str], stdout=None, on_output: Callable[[str, bytes], None] | None = None, timeout: float | None = None, **kwargs) -> ProcessResult:
+    """Runs a command to completion on an event loop, streaming its output to `on_output(stream, chunk)` as it arrives. Only the end of the output is kept in memory (see `OutputTail`). `stdout` can be a file to write it to instead.
+
+    Commands run by a setup step are stopped at the step's deadline, or when the scheduler cancels the run after another step fails. Stopping a command also stops the processes it started."""
+    step_run = current_step_run()
+    cancelled = None
+    if step_run is not None:
+        cancelled = step_run.cancelled
+        remaining = step_run.remaining()
+        if remaining is not None:
+            timeout = max(min(timeout if timeout is not None else math.inf, remaining), 0.0)
+
+    return asyncio.run(__run(args, stdout, on_output, timeout, cancelled, **kwargs))
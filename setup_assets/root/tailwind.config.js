@@ -1,5 +1,6 @@
 module.exports = {
     darkMode: 'class',
+    // Created by 'setup.py' from the project templates and 'TEMPLATES_DIRS_ADDITIONS' in 'config.py'
     content: [
         './**/*.html',
         './node_modules/flowbite/**/*.js',
@@ -0,0 +1,1130 @@
+import ast
+import dataclasses
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+from functools import partial, wraps
+
+from setup_assets.constants import SETUP_GENERATED_MANIFEST_PATH, SETUP_ROOT_DIR
+from setup_assets.asset_copy import copy_files, plan_copies
+from setup_assets.cache import build_entry, cache_entry_path, entry_lock, evict_cache, files_key, package_set_key, platform_key, touch_entry
+from setup_assets.context import ScaffoldContext, default_settings
+from setup_assets.django_worker import DjangoWorker
+from setup_assets.downloads import download_libraries, release_target
+from setup_assets.golden_venv import VENV_BIN_DIRNAME, clone_venv, relocate_venv
+from setup_assets.lockfiles import load_npm_lock, pip_lock_matches, write_npm_project
+from setup_assets.source_edit import find_assignment, find_import_from, insert_after_node, last_import, replace_node, transform_file
+from setup_assets.instrument import instrumented, process_log, record_django_command, run_command
+from setup_assets.precompress import brotli, precompress_dir
+from setup_assets.journal import Journal, plan_resume, remove_outputs, step_input_hash
+from setup_assets.merge import load_manifest, merge_files, record_files
+from setup_assets.scheduler import Step, run_steps
+from setup_assets.skeleton import random_secret_key, save_django_templates, venv_django_dir
+
+# Helper functions
+def __handle_project_name(project_name: str) -> str:
+    """Helper function for replacing whitespace and dashes in the project name."""
+    name_split = []
+
+    if '-' in project_name:
+        name_split = project_name.split('-')
+    elif ' ' in project_name:
+        name_split = project_name.split(' ')
+
+    if len(name_split) != 0:
+        project_name = '_'.join(name_split)
+    
+    return project_name.strip()
+
+
+def __settings_formatter_loop(settings_items: list[str], additions: str) -> str:
+    """Helper function to create an `additions` string for adding items to the `settings.py` file. Loops through the `settings_items` and adapts them to a specific format before adding them to `additions`."""
+    for item in settings_items:
+        additions += ''.join(f"    '{item}',\n")
+    return additions
+
+
+def __dev_only_block(name: str, items: list[str]) -> str:
+    """Helper function to create an `if DEBUG:` block for the `settings.py` file, which extends the `name` setting with development only `items`. Returns an empty string when there aren't any."""
+    if not items:
+        return ''
+
+    block = f"\n\n# Development only, loaded when DEBUG_MODE is on\nif DEBUG:\n    {name} += [\n"
+    for item in items:
+        block += f"        '{item}',\n"
+    return block + "    ]"
+
+
+def __required_assignment(tree: ast.Module, name: str, ctx: ScaffoldContext) -> ast.Assign | ast.AnnAssign:
+    """Helper function for the `config/settings.py` rules. Returns the top-level assignment to `name`, raising an error if it doesn't exist."""
+    node = find_assignment(tree, name)
+    if node is None:
+        raise ValueError(f"Couldn't find the '{name}' setting in '{ctx.settings_path}'.")
+    return node
+
+
+def __pip_packages_key(ctx: ScaffoldContext) -> tuple[str, bool]:
+    """Helper function for `create_virtual_environment()` and `install_packages()`. Returns the cache key of the pip packages to install, and whether they're installed from `PIP_LOCKFILE`. Locked packages are keyed by the lockfile's contents, the rest by the `PIP_PACKAGES`."""
+    if pip_lock_matches(ctx.PIP_LOCKFILE, ctx.PIP_PACKAGES):
+        return files_key(ctx.PIP_LOCKFILE, extra={"platform": platform_key()}), True
+    return package_set_key(["pip"], ctx.PIP_PACKAGES), False
+
+
+def __install_from_wheelhouse(ctx: ScaffoldContext, pip: str, key: str, locked: bool) -> None:
+    """Helper function for `create_virtual_environment()` and `install_packages()`. Installs the `PIP_PACKAGES` with the given `pip` executable from a cached wheelhouse. The wheelhouse is built on the first run for each package set (or when `--refresh-cache` is used), later runs install offline.
+
+    Locked packages are installed exactly as pinned in `PIP_LOCKFILE`, with their hashes checked and without resolving dependencies or upgrading `pip`."""
+    wheelhouse = cache_entry_path(ctx.CACHE_DIR, "wheels", key)
+
+    with entry_lock(wheelhouse):
+        if ctx.refresh_cache or not os.path.isdir(wheelhouse):
+            with build_entry(wheelhouse, replace=ctx.refresh_cache) as tmp_wheelhouse:
+                if locked:
+                    run_command([pip, "download", "--require-hashes", "--no-deps", "--dest", tmp_wheelhouse, "-r", ctx.PIP_LOCKFILE])
+                else:
+                    run_command([pip, "wheel", "--wheel-dir", tmp_wheelhouse, "pip", *ctx.PIP_PACKAGES])
+        else:
+            touch_entry(wheelhouse)
+
+    offline_args = ["--no-index", "--find-links", wheelhouse]
+    if locked:
+        run_command([pip, "install", *offline_args, "--require-hashes", "--no-deps", "-r", ctx.PIP_LOCKFILE])
+    else:
+        run_command([pip, "install", *offline_args, "--upgrade", "pip"])
+        run_command([pip, "install", *offline_args, *ctx.PIP_PACKAGES])
+
+    evict_cache(ctx.CACHE_DIR, ctx.CACHE_MAX_SIZE_MB, keep=(wheelhouse,))
+
+
+def __template_dir_path(node: ast.expr) -> str | None:
+    """Helper function for `__tailwind_template_dirs()`. Returns the project path of a `TEMPLATES_DIRS_ADDITIONS` expression, such as `os.path.join(BASE_DIR, 'templates')` or `BASE_DIR / 'templates'`. Returns `None` when it can't be worked out."""
+    if isinstance(node, ast.Name) and node.id == "BASE_DIR":
+        return '.'
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Div):
+        parts = [__template_dir_path(node.left), __template_dir_path(node.right)]
+    elif isinstance(node, ast.Call) and ast.unparse(node.func) in ("os.path.join", "Path") and node.args:
+        parts = [__template_dir_path(arg) for arg in node.args]
+    else:
+        return None
+
+    return None if None in parts else os.path.normpath(os.path.join(*parts))
+
+
+def __tailwind_template_dirs(ctx: ScaffoldContext) -> list[str]:
+    """Helper function for `tailwind_config_content()`. Returns the template folders Tailwind CSS scans, relative to the project: the `FIRSTAPP_DIR` templates and the `TEMPLATES_DIRS_ADDITIONS`."""
+    template_dirs = [ctx.template_dir]
+    for addition in ctx.TEMPLATES_DIRS_ADDITIONS:
+        path = __template_dir_path(ast.parse(addition, mode="eval").body)
+        if path is None:
+            print(f"Tailwind CSS won't scan '{addition}', add it to the 'content' in '{ctx.TAILWIND_CONFIG_FILENAME}' manually.")
+        else:
+            template_dirs.append(path)
+    return template_dirs
+
+
+def __flowbite_path(ctx: ScaffoldContext) -> str:
+    """Helper function for `tailwind_config_content()` and `__build_tailwind_css()`. Returns the path of Flowbite's JS that Tailwind CSS scans, relative to the project: the downloaded copy with `--standalone-tailwind`, otherwise the one in `node_modules`."""
+    if ctx.standalone_tailwind:
+        return os.path.join(ctx.static_dir, 'js', ctx.FLOWBITE_FILENAME)
+    return ctx.FLOWBITE_URL
+
+
+def __tailwind_cli(ctx: ScaffoldContext) -> str:
+    """Helper function for `configure_npm_assets()`. Returns the command that runs Tailwind CSS in the project folder: the standalone CLI with `--standalone-tailwind`, otherwise `npx`."""
+    if ctx.standalone_tailwind:
+        return ctx.TAILWIND_STANDALONE_FILENAME if sys.platform.startswith("win") else f"./{ctx.TAILWIND_STANDALONE_FILENAME}"
+    return "npx tailwindcss"
+
+
+def __tailwind_standalone_url(ctx: ScaffoldContext) -> str:
+    """Helper function for `__install_standalone_tailwind()`. Returns the download url of the Tailwind CSS standalone CLI for this OS and architecture."""
+    target = release_target()
+    if target not in ctx.TAILWIND_STANDALONE_TARGETS:
+        raise ValueError(f"There's no Tailwind CSS standalone CLI for '{sys.platform} {platform.machine()}', create the project without '--standalone-tailwind'.")
+
+    return ctx.TAILWIND_STANDALONE_URL.format(version=ctx.TAILWIND_STANDALONE_VERSION, target=target)
+
+
+def __install_standalone_tailwind(ctx: ScaffoldContext) -> None:
+    """Helper function for `configure_npm_assets()`. Fetches the Tailwind CSS standalone CLI into the project folder and the `STANDALONE_JS_LIBRARIES` into the static folder, through the download cache (or the `--offline-mirror`). Both are checked against their pinned hashes in `JS_LIBRARIES_LOCKFILE`, like the `JS_LIBRARIES`."""
+    download_libraries({ctx.TAILWIND_STANDALONE_FILENAME: __tailwind_standalone_url(ctx)}, ctx.project_dir, ctx.CACHE_DIR, ctx.JS_LIBRARIES_LOCKFILE, ctx.offline_mirror)
+    cli = ctx.path(ctx.TAILWIND_STANDALONE_FILENAME)
+    os.chmod(cli, os.stat(cli).st_mode | 0o111)
+
+    download_libraries(ctx.STANDALONE_JS_LIBRARIES, ctx.path(ctx.static_dir, 'js'), ctx.CACHE_DIR, ctx.JS_LIBRARIES_LOCKFILE, ctx.offline_mirror)
+
+
+def __build_tailwind_css(ctx: ScaffoldContext) -> None:
+    """Helper function for `configure_npm_assets()`. Builds the Tailwind CSS output, reusing a cached copy when the templates, config, input CSS, Flowbite and Tailwind versions match an earlier build."""
+    if ctx.standalone_tailwind:
+        tailwind_version = f"standalone-{ctx.TAILWIND_STANDALONE_VERSION}"
+    else:
+        try:
+            with open(ctx.path("node_modules", "tailwindcss", "package.json"), "r") as file:
+                tailwind_version = json.load(file)["version"]
+        except (OSError, KeyError, ValueError):
+            tailwind_version = None
+
+    sources = [ctx.TAILWIND_CONFIG_FILENAME, ctx.tailwind_input_css_path, __flowbite_path(ctx), *__tailwind_template_dirs(ctx)]
+    key = files_key(*[ctx.path(source) for source in sources], extra={"tailwindcss": tailwind_version})
+    css_entry = cache_entry_path(ctx.CACHE_DIR, "css", key)
+    cached_css = os.path.join(css_entry, "output.css")
+
+    with entry_lock(css_entry):
+        if ctx.refresh_cache or not os.path.isfile(cached_css):
+            # Replace any entry left without an output by a failed build
+            with build_entry(css_entry, replace=True) as tmp_dir:
+                cli = [ctx.path(ctx.TAILWIND_STANDALONE_FILENAME)] if ctx.standalone_tailwind else ["npx", "tailwindcss"]
+                run_command([*cli, "-i", f"./{ctx.tailwind_input_css_path}", "-o", os.path.join(tmp_dir, "output.css")], cwd=ctx.project_dir)
+        else:
+            touch_entry(css_entry)
+
+        if os.path.isfile(cached_css):
+            copy_files([(cached_css, ctx.path(ctx.tailwind_output_css_path))])
+
+
+# Decorators
+def readwrite_file(path: str):
+    """Decorator for using 'file.read()' and writing replacement content to it."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with open(path, "r") as file:
+                content = file.read()
+
+            content = func(content, *args, **kwargs)
+
+            with open(path, "w") as file:
+                file.writelines(content)
+
+        return wrapper
+    return decorator
+
+
+# Setup functions
+def project_directory(name: str, outside_flag: bool) -> str:
+    """Returns the path of the project directory for `name`, inside (or next to) the setup folder."""
+    name = __handle_project_name(name)
+    if outside_flag:
+        return os.path.join(os.path.dirname(SETUP_ROOT_DIR), name)
+    return os.path.join(SETUP_ROOT_DIR, name)
+
+
+def create_root_directory(name: str, outside_flag: bool, force_flag: bool, resume_flag: bool = False) -> str:
+    """Creates the root project directory, inside (or next to) the setup folder, and returns its path. When resuming, an existing one is reused instead."""
+    name = __handle_project_name(name)
+    print(f"Project name set to: '{name}'.\n")
+
+    path = project_directory(name, outside_flag)
+    
+    qs_dir = os.path.basename(SETUP_ROOT_DIR)
+    parent_sq_dir = f"'{os.path.basename(os.path.dirname(path))}'"
+    outside_folder_text = f"outside '{qs_dir}' -> into {parent_sq_dir}"
+    inside_folder_text = f"inside '{qs_dir}'"
+    creation_str = f"{outside_folder_text if outside_flag else inside_folder_text}..."
+    print(f"Attempting project creation {creation_str}", end=' ')
+
+    if resume_flag and os.path.isdir(path):
+        print('Success!')
+        print(f"Resuming project '{name}' at '{path}'.\n")
+        return path
+
+    if os.path.exists(path):
+        print('Failed.\n')
+        print(f"Project with name '{name}' already exists!")
+        if force_flag:
+            print("Attempting force deletion...", end=' ')
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                    print('Success!')
+                    print(f"Project successfully removed. Creating new one {creation_str} Success!")
+                else:
+                    print('Failed!')
+                    print(f"The path '{path}' is not a directory.")
+                    sys.exit()
+            except Exception as e:
+                print('Failed!')
+                print(f'Error: {path} -> {e}')
+                sys.exit()
+        else:
+            print(f"A project already exists with that name ('{name}')! Use the '--resume' flag to finish setting it up, or the '--force' flag to delete it and create a new one.")
+            sys.exit()
+    else:
+        print('Success!')
+
+    os.makedirs(path)
+    print(f"Project '{name}' created at '{path}'.\n")
+    return path
+
+
+def create_virtual_environment(ctx: ScaffoldContext) -> None:
+    """Creates the project venv. In golden venv mode, it's cloned from a cached venv that already contains the `PIP_PACKAGES`, which is built once per package set (or `PIP_LOCKFILE`)."""
+    if not ctx.golden_venv:
+        run_command(["python", "-m", "venv", ctx.path("venv")])
+        return
+
+    key, locked = __pip_packages_key(ctx)
+    golden_dir = cache_entry_path(ctx.CACHE_DIR, "venvs", key)
+
+    with entry_lock(golden_dir):
+        if ctx.refresh_cache or not os.path.isdir(golden_dir):
+            with build_entry(golden_dir, replace=ctx.refresh_cache) as tmp_dir:
+                run_command([sys.executable, "-m", "venv", tmp_dir])
+                __install_from_wheelhouse(ctx, os.path.join(tmp_dir, VENV_BIN_DIRNAME, "pip"), key, locked)
+                relocate_venv(tmp_dir, tmp_dir, golden_dir)
+        else:
+            touch_entry(golden_dir)
+
+    clone_venv(golden_dir, ctx.path("venv"))
+
+
+def install_packages(ctx: ScaffoldContext) -> None:
+    # Golden venv clones already contain the packages
+    if ctx.golden_venv:
+        return
+
+    __install_from_wheelhouse(ctx, os.path.join(ctx.venv_bin, "pip"), *__pip_packages_key(ctx))
+
+
+def create_requirements_txt(ctx: ScaffoldContext) -> None:
+    with open(ctx.path("requirements.txt"), "w") as file:
+        run_command([os.path.join(ctx.venv_bin, "pip"), "freeze"], stdout=file)
+
+
+def start_django_worker(ctx: ScaffoldContext) -> None:
+    """Starts the Django worker process in the project venv, which runs every Django command for the rest of the setup."""
+    ctx.django_worker = DjangoWorker(os.path.join(ctx.venv_bin, "python"), f"{ctx.SETTINGS_DIR}.settings", cwd=ctx.project_dir, stderr=process_log("django-worker"))
+
+
+def django_templates_entry(ctx: ScaffoldContext) -> str:
+    """Returns the cache entry for the `startproject` and `startapp` templates of the Django the `PIP_PACKAGES` install, see `save_django_templates()`."""
+    return cache_entry_path(ctx.CACHE_DIR, "django-templates", __pip_packages_key(ctx)[0])
+
+
+def run_django_startproject(ctx: ScaffoldContext) -> None:
+    record_django_command(ctx.django_worker.run_command("startproject", ctx.SETTINGS_DIR, "."))
+    record_django_command(ctx.django_worker.run_command("startapp", ctx.FIRSTAPP_DIR))
+
+    # Kept for '--dry-run', which renders the project without a venv
+    django_dir = venv_django_dir(ctx.path("venv"))
+    if django_dir is not None:
+        save_django_templates(django_dir, django_templates_entry(ctx))
+
+
+def make_static_dirs(ctx: ScaffoldContext) -> None:
+    os.makedirs(ctx.path(ctx.static_dir, "css"))
+    os.makedirs(ctx.path(ctx.static_dir, "js"))
+    os.makedirs(ctx.path(ctx.static_dir, "imgs"))
+
+
+def asset_copies(ctx: ScaffoldContext) -> list[tuple[str, str]]:
+    """Returns a `(src, dest)` pair for each item in the `setup_assets` folder, mapped to its location in the project directory. The `firstapp` templates are mapped straight into their `FIRSTAPP_DIR` folder."""
+    try:
+        return [
+            # Root folder assets into root project dir, the Tailwind CSS config is created separately
+            *[(src, dest) for src, dest in plan_copies(ctx.SETUP_ASSETS_ROOT_DIR, ctx.project_dir) if os.path.basename(src) != ctx.TAILWIND_CONFIG_FILENAME],
+            # Static into firstapp static dir
+            *plan_copies(ctx.SETUP_ASSETS_STATIC_DIR, ctx.path(ctx.static_dir)),
+            # Templates into firstapp templates dir
+            *plan_copies(ctx.SETUP_ASSETS_TEMPLATE_DIR, ctx.path(ctx.template_dir), renames={ctx.SETUP_FIRSTAPP_DIR: ctx.FIRSTAPP_DIR}),
+            # Performance tests and profiling middleware into the firstapp, the load test script is created separately
+            *[(os.path.join(ctx.SETUP_ASSETS_PERFORMANCE_DIR, name), ctx.path(ctx.FIRSTAPP_DIR, name)) for name in ("profiling.py", "test_performance.py")],
+        ]
+    except FileNotFoundError as e:
+        raise FileNotFoundError(f"{e}\nDoes a 'setup_assets' folder exist in: '{SETUP_ROOT_DIR}' and contain the required folder?")
+
+
+def move_setup_assets_to_project(ctx: ScaffoldContext) -> None:
+    """Duplicates the items in the `setup_assets` folder into the respective locations in the project directory, in parallel."""
+    copy_files(asset_copies(ctx), ctx.ASSET_COPY_MODE)
+    create_tailwind_config(ctx)
+
+    with open(ctx.path("loadtest.py"), "w") as file:
+        file.write(loadtest_content(ctx))
+
+
+def tailwind_config_content(ctx: ScaffoldContext) -> str:
+    """Returns the Tailwind CSS config, made from the one in `setup_assets` with its `content` limited to the project templates and Flowbite's JS. Scanning the whole project would include the venv and `node_modules`."""
+    with open(os.path.join(ctx.SETUP_ASSETS_ROOT_DIR, ctx.TAILWIND_CONFIG_FILENAME), "r") as file:
+        content = file.read()
+
+    paths = [f"./{path.replace(os.sep, '/')}/**/*.html" for path in __tailwind_template_dirs(ctx)] + [f"./{__flowbite_path(ctx).replace(os.sep, '/')}"]
+    content_paths = ''.join(f"\n        '{path}'," for path in paths)
+
+    # The standalone CLI can't load Flowbite's plugin, which needs other NPM packages
+    if ctx.standalone_tailwind:
+        content = content.replace("        require('flowbite/plugin'),\n", '')
+
+    return re.sub(r"content: \[.*?\]", f"content: [{content_paths}\n    ]", content, count=1, flags=re.DOTALL)
+
+
+def create_tailwind_config(ctx: ScaffoldContext) -> None:
+    with open(ctx.path(ctx.TAILWIND_CONFIG_FILENAME), "w") as file:
+        file.write(tailwind_config_content(ctx))
+
+
+def configure_npm_assets(ctx: ScaffoldContext) -> None:
+    """Installs the NPM packages through a cached tarball store, then builds the Tailwind CSS output. The store is filled on the first run for each package set (or when `--refresh-cache` is used), later runs install offline.
+
+    When `NPM_LOCKFILE` matches the packages, it's copied into the project and installed with `npm ci`, which skips resolving them. With `--standalone-tailwind`, the Tailwind CSS standalone CLI and library files are used instead and nothing is installed."""
+    tw_css_cmd = f"{__tailwind_cli(ctx)} -i ./{ctx.tailwind_input_css_path} -o ./{ctx.tailwind_output_css_path} --watch"
+
+    if ctx.standalone_tailwind:
+        __install_standalone_tailwind(ctx)
+        __build_tailwind_css(ctx)
+
+        # A 'package.json' with just the 'dev' command, so 'npm run dev' works the same
+        with open(ctx.path("package.json"), "w") as file:
+            json.dump({"private": True, "scripts": {"dev": tw_css_cmd}}, file, indent=2)
+            file.write('\n')
+        return
+
+    npm_lock = load_npm_lock(ctx.NPM_LOCKFILE, ctx.NPM_DEV_PACKAGES, ctx.NPM_PACKAGES)
+    if npm_lock is not None:
+        write_npm_project(npm_lock, ctx.project_dir)
+        installs = [["npm", "ci"]]
+        key = files_key(ctx.NPM_LOCKFILE)
+    else:
+        installs = [["npm", "install", "-D", *ctx.NPM_DEV_PACKAGES], ["npm", "install", *ctx.NPM_PACKAGES]]
+        key = package_set_key(ctx.NPM_DEV_PACKAGES, ctx.NPM_PACKAGES, platform_specific=False)
+
+    npm_store = cache_entry_path(ctx.CACHE_DIR, "npm", key)
+
+    with entry_lock(npm_store):
+        if ctx.refresh_cache or not os.path.isdir(npm_store):
+            with build_entry(npm_store, replace=ctx.refresh_cache) as tmp_store:
+                for install in installs:
+                    run_command([*install, "--cache", tmp_store], cwd=ctx.project_dir)
+        else:
+            touch_entry(npm_store)
+            for install in installs:
+                run_command([*install, "--cache", npm_store, "--offline"], cwd=ctx.project_dir)
+
+    evict_cache(ctx.CACHE_DIR, ctx.CACHE_MAX_SIZE_MB, keep=(npm_store,))
+    
+    __build_tailwind_css(ctx)
+
+    # Update package.json for watching tailwindcss with 'dev' command
+    @readwrite_file(path=ctx.path("package.json"))
+    def update_content(content: str) -> str:
+        old_content = '"devDependencies": {'
+        new_content = '"scripts": {\n\t\t"dev": ' + f'"{tw_css_cmd}"' + '\n\t},\n\t' + old_content
+
+        content = content.replace(
+            old_content,
+            new_content,
+            1
+        )
+        return content
+    
+    update_content()
+
+
+def copy_npm_libraries_to_static(ctx: ScaffoldContext) -> None:
+    """Copies Flowbite and AlpineJS from `node_modules` into the static folder. With `--standalone-tailwind`, they're already downloaded there."""
+    if ctx.standalone_tailwind:
+        return
+
+    flowbite = ctx.path(ctx.FLOWBITE_URL)
+    copies = [
+        (flowbite, ctx.path(ctx.static_dir, 'js', ctx.FLOWBITE_FILENAME)),
+        (ctx.path(ctx.ALPINE_URL), ctx.path(ctx.static_dir, 'js', ctx.ALPINE_FILENAME)),
+    ]
+
+    # Hashed static file storage fails on source map comments whose file is missing
+    if os.path.isfile(f"{flowbite}.map"):
+        copies.append((f"{flowbite}.map", ctx.path(ctx.static_dir, 'js', f"{ctx.FLOWBITE_FILENAME}.map")))
+
+    copy_files(copies, ctx.ASSET_COPY_MODE)
+
+
+def download_js_libraries_to_static(ctx: ScaffoldContext) -> None:
+    """Fetches the `JS_LIBRARIES` into the static folder concurrently, through the download cache (or the `--offline-mirror`). Each one is checked against its pinned hash in `JS_LIBRARIES_LOCKFILE`."""
+    download_libraries(ctx.JS_LIBRARIES, ctx.path(ctx.static_dir, 'js'), ctx.CACHE_DIR, ctx.JS_LIBRARIES_LOCKFILE, ctx.offline_mirror)
+
+
+def init_updates_to_settings_file(content: str, ctx: ScaffoldContext) -> str:
+    tree = ast.parse(content)
+
+    # Add imports for os and load_dotenv after 'from pathlib import Path'
+    import_node = find_import_from(tree, "pathlib") or last_import(tree)
+    content = insert_after_node(content, import_node, "import os\nfrom dotenv import load_dotenv")
+
+    # Add load_dotenv() under BASE_DIR
+    tree = ast.parse(content)
+    base_dir_node = find_assignment(tree, "BASE_DIR") or last_import(tree)
+    content = insert_after_node(content, base_dir_node, "load_dotenv()")
+
+    # Replace DEBUG with a boolean read from the '.env', as any non-empty string (even 'False') would turn it on
+    tree = ast.parse(content)
+    debug_node = __required_assignment(tree, "DEBUG", ctx)
+    content = replace_node(content, debug_node.value, "os.getenv('DEBUG_MODE') == 'True'")
+
+    # Add root templates directory to TEMPLATES/DIRS
+    tree = ast.parse(content)
+    templates_node = __required_assignment(tree, "TEMPLATES", ctx)
+    for template in templates_node.value.elts:
+        for key, value in zip(template.keys, template.values):
+            if isinstance(key, ast.Constant) and key.value == 'DIRS':
+                new_template_dirs = '[\n'
+                for item in ctx.TEMPLATES_DIRS_ADDITIONS:
+                    new_template_dirs += ''.join(f'            {item},\n')
+                new_template_dirs += '        ]'
+                return replace_node(content, value, new_template_dirs)
+
+    raise ValueError("Couldn't find 'DIRS' in the 'TEMPLATES' setting.")
+
+
+def update_secret_key(content: str, ctx: ScaffoldContext) -> str:
+    # Replace SECRET_KEY with os.getenv
+    secret_key_node = __required_assignment(ast.parse(content), "SECRET_KEY", ctx)
+    return replace_node(content, secret_key_node, "SECRET_KEY = os.getenv('DJANGO_SECRET_KEY')")
+
+
+def env_file_content(ctx: ScaffoldContext, secret_key: str) -> str:
+    """Returns the `.env` file content, one parameter per line."""
+    env_str = f"DJANGO_SECRET_KEY={secret_key}\n"
+    env_str += "DEBUG_MODE=True\n"
+    env_str += f"DJANGO_SUPERUSER_PASSWORD={ctx.SUPERUSER_PASSWORD}\n"
+    env_str += "PROFILE_REQUESTS=False\n"
+
+    # Add additional custom config settings
+    for item in ctx.ENV_FILE_ADDITIONAL_PARAMS:
+        env_str += f"{item}\n"
+
+    if ctx.settings_profile == 'production':
+        env_str += "# Persistent connections (in seconds) for WSGI servers only, keep it at 0 when serving through 'asgi.py'\n"
+        env_str += "DJANGO_CONN_MAX_AGE=0\n"
+        env_str += "# Local memory cache, or 'django.core.cache.backends.filebased.FileBasedCache' with a folder path as the location\n"
+        env_str += "DJANGO_CACHE_BACKEND=django.core.cache.backends.locmem.LocMemCache\n"
+        env_str += "DJANGO_CACHE_LOCATION=\n"
+    return env_str
+
+
+def generate_env_file(ctx: ScaffoldContext) -> None:
+    with open(ctx.path(".env"), "w") as file:
+        file.write(env_file_content(ctx, ctx.django_worker.secret_key()))
+
+
+def update_installed_apps(content: str, ctx: ScaffoldContext) -> str:
+    installed_apps_node = __required_assignment(ast.parse(content), "INSTALLED_APPS", ctx)
+
+    installed_apps_str = 'INSTALLED_APPS = [\n'
+    installed_apps_str = __settings_formatter_loop(ast.literal_eval(installed_apps_node.value), installed_apps_str)
+
+    installed_apps_str += '\n    # 3rd party\n'
+    installed_apps_str = __settings_formatter_loop(ctx.INSTALLED_APPS_3RDPARTY, installed_apps_str)
+
+    installed_apps_str += '\n    # local apps\n'
+    installed_apps_str = __settings_formatter_loop(ctx.INSTALLED_APPS_LOCAL, installed_apps_str)
+    installed_apps_str += ']'
+    installed_apps_str += __dev_only_block("INSTALLED_APPS", ctx.INSTALLED_APPS_DEV)
+
+    return replace_node(content, installed_apps_node, installed_apps_str)
+
+
+def update_middleware(content: str, ctx: ScaffoldContext) -> str:
+    middleware_node = __required_assignment(ast.parse(content), "MIDDLEWARE", ctx)
+    middleware = ast.literal_eval(middleware_node.value)
+
+    # 3rd party middleware goes after the session middleware, or first if it's missing
+    session_middleware = 'django.contrib.sessions.middleware.SessionMiddleware'
+    split_idx = middleware.index(session_middleware) + 1 if session_middleware in middleware else 0
+
+    middleware_str = 'MIDDLEWARE = [\n'
+    middleware_str = __settings_formatter_loop(middleware[:split_idx], middleware_str)
+
+    middleware_str += '\n    # 3rd party\n'
+    middleware_str = __settings_formatter_loop(ctx.MIDDLEWARE_3RDPARTY, middleware_str)
+
+    middleware_str += '\n    # Core\n'
+    middleware_str = __settings_formatter_loop(middleware[split_idx:], middleware_str)
+    middleware_str += ']'
+    middleware_str += __dev_only_block("MIDDLEWARE", ctx.MIDDLEWARE_DEV)
+
+    return replace_node(content, middleware_node, middleware_str)
+
+
+def add_staticfiles_config(content: str, ctx: ScaffoldContext) -> str:
+    static_url_node = __required_assignment(ast.parse(content), "STATIC_URL", ctx)
+
+    static_url_line = f"STATIC_URL = '{ctx.STATIC_URL}'\n"
+    static_root_line = f"STATIC_ROOT = os.path.join(BASE_DIR.parent, '{ctx.STATIC_ROOT_DIR}')\n\n"
+
+    staticfiles_dir_str = "STATICFILES_DIRS = [\n"
+    for item in ctx.NEW_STATICFILES_DIRS:
+        staticfiles_dir_str += ''.join(f'    {item},\n')
+    staticfiles_dir_str += "]\n\n"
+
+    staticfiles_finders_str = "STATICFILES_FINDERS = [\n    # Default finders\n"
+    staticfiles_finders_str = __settings_formatter_loop(ctx.STATICFILES_DEFAULT_FINDERS, staticfiles_finders_str)
+    staticfiles_finders_str += '\n    # 3rd party\n'
+
+    staticfiles_finders_str = __settings_formatter_loop(ctx.NEW_STATICFILES_3RDPARTY_FINDERS, staticfiles_finders_str)
+    staticfiles_finders_str += ']\n'
+
+    new_staticfile_settings = static_url_line + static_root_line + staticfiles_dir_str + staticfiles_finders_str
+    return replace_node(content, static_url_node, new_staticfile_settings)
+
+
+def add_compressor_config(content: str, ctx: ScaffoldContext) -> str:
+    compressor_str = "\n# Django compressor\n"
+    compressor_str += "# https://django-compressor.readthedocs.io/en/stable/\n\n"
+    compressor_str += f"COMPRESS_ROOT = os.path.join(BASE_DIR, '{ctx.FIRSTAPP_DIR}', 'static')\n"
+    compressor_str += "COMPRESS_ENABLED = True\n"
+    return content.rstrip('\n') + '\n' + compressor_str
+
+
+def add_production_static_config(content: str, ctx: ScaffoldContext) -> str:
+    """Adds hashed static file names and offline compression in `--prod-assets` mode. The files are collected into the project's own `STATIC_ROOT`, with the compressed bundles."""
+    if not ctx.prod_assets:
+        return content
+
+    static_root_node = __required_assignment(ast.parse(content), "STATIC_ROOT", ctx)
+    content = replace_node(content, static_root_node.value, f"os.path.join(BASE_DIR, '{ctx.STATIC_ROOT_DIR}')")
+
+    compress_root_node = __required_assignment(ast.parse(content), "COMPRESS_ROOT", ctx)
+    content = replace_node(content, compress_root_node.value, "STATIC_ROOT")
+
+    production_str = "\n# Production static files, run 'collectstatic' and 'compress' after changing them\n"
+    production_str += "# https://docs.djangoproject.com/en/stable/ref/contrib/staticfiles/#manifeststaticfilesstorage\n\n"
+    production_str += "STORAGES = {\n"
+    production_str += "    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},\n"
+    production_str += "    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'},\n"
+    production_str += "}\n"
+    production_str += "COMPRESS_OFFLINE = not DEBUG\n"
+    return content.rstrip('\n') + '\n' + production_str
+
+
+def add_production_profile(content: str, ctx: ScaffoldContext) -> str:
+    """Adds the tuned settings of the production profile: persistent database connections, SQLite pragmas, a cache configured through the `.env`, cached sessions and the cached template loader when `DEBUG` is off."""
+    if ctx.settings_profile != 'production':
+        return content
+
+    profile_str = "\n# Production profile\n"
+    profile_str += "# https://docs.djangoproject.com/en/stable/ref/databases/#persistent-connections\n\n"
+    profile_str += "# Off by default, as Django's docs advise against persistent connections under ASGI (the 'asgi.py' entry point)\n"
+    profile_str += "DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DJANGO_CONN_MAX_AGE', '0'))\n"
+    profile_str += "DATABASES['default']['CONN_HEALTH_CHECKS'] = True\n\n"
+
+    profile_str += "# Write-ahead logging lets reads run alongside a write, immediate transactions avoid 'database is locked' errors on upgrade\n"
+    profile_str += "if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':\n"
+    profile_str += "    DATABASES['default']['OPTIONS'] = {\n"
+    profile_str += "        'transaction_mode': 'IMMEDIATE',\n"
+    profile_str += "        'init_command': (\n"
+    profile_str += "            'PRAGMA journal_mode=WAL;'\n"
+    profile_str += "            'PRAGMA synchronous=NORMAL;'\n"
+    profile_str += "            'PRAGMA busy_timeout=5000;'\n"
+    profile_str += "            'PRAGMA temp_store=MEMORY;'\n"
+    profile_str += "            'PRAGMA mmap_size=134217728;'\n"
+    profile_str += "            'PRAGMA journal_size_limit=27103364;'\n"
+    profile_str += "            'PRAGMA cache_size=2000;'\n"
+    profile_str += "        ),\n"
+    profile_str += "    }\n\n"
+
+    profile_str += "CACHES = {\n"
+    profile_str += "    'default': {\n"
+    profile_str += "        'BACKEND': os.getenv('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),\n"
+    profile_str += "        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', ''),\n"
+    profile_str += "    }\n"
+    profile_str += "}\n"
+    profile_str += "SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'\n\n"
+
+    profile_str += "if not DEBUG:\n"
+    profile_str += "    TEMPLATES[0]['APP_DIRS'] = False\n"
+    profile_str += "    TEMPLATES[0]['OPTIONS']['loaders'] = [\n"
+    profile_str += "        ('django.template.loaders.cached.Loader', [\n"
+    profile_str += "            'django.template.loaders.filesystem.Loader',\n"
+    profile_str += "            'django.template.loaders.app_directories.Loader',\n"
+    profile_str += "        ]),\n"
+    profile_str += "    ]\n"
+    return content.rstrip('\n') + '\n' + profile_str
+
+
+def add_fragment_cache_config(content: str, ctx: ScaffoldContext) -> str:
+    """Adds the 'fragments' cache used by the `{% cache %}` blocks in the templates. It's a dummy cache while `DEBUG` is on, so template edits show straight away."""
+    backend_str = "'django.core.cache.backends.dummy.DummyCache' if DEBUG else 'django.core.cache.backends.locmem.LocMemCache'"
+
+    cache_str = "\n# Template fragment cache, used by the '{% cache %}' blocks\n"
+    cache_str += "# https://docs.djangoproject.com/en/stable/topics/cache/#template-fragment-caching\n\n"
+    if ctx.settings_profile == 'production':
+        cache_str += "CACHES['fragments'] = {\n"
+        cache_str += f"    'BACKEND': {backend_str},\n"
+        cache_str += "    'LOCATION': 'fragments',\n"
+        cache_str += "}\n"
+    else:
+        cache_str += "CACHES = {\n"
+        cache_str += "    'default': {\n"
+        cache_str += "        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',\n"
+        cache_str += "    },\n"
+        cache_str += "    'fragments': {\n"
+        cache_str += f"        'BACKEND': {backend_str},\n"
+        cache_str += "        'LOCATION': 'fragments',\n"
+        cache_str += "    },\n"
+        cache_str += "}\n"
+    return content.rstrip('\n') + '\n' + cache_str
+
+
+def add_profiling_config(content: str, ctx: ScaffoldContext) -> str:
+    """Adds the profiling middleware from the `FIRSTAPP_DIR`, first so it times the whole request. It's turned on with `PROFILE_REQUESTS` in `.env`, and only loaded when `DEBUG` is on."""
+    profiling_str = f"\n\n# Per-request SQL timing and cProfile stats, see '{ctx.FIRSTAPP_DIR}/profiling.py'. Development only\n"
+    profiling_str += "PROFILE_REQUESTS = os.getenv('PROFILE_REQUESTS') == 'True'\n\n"
+    profiling_str += "if DEBUG:\n"
+    profiling_str += f"    MIDDLEWARE.insert(0, '{ctx.FIRSTAPP_DIR}.profiling.ProfilingMiddleware')\n"
+    return content.rstrip('\n') + profiling_str
+
+
+def add_asgi_server_entry(content: str, ctx: ScaffoldContext) -> str:
+    """Adds an optional `uvicorn` entry point to `config/asgi.py`. It serves the `application` already built by the module, rather than an import string that would build it again."""
+    entry_str = "\n\nif __name__ == '__main__':\n"
+    entry_str += f"    # Production server: 'python -m {ctx.SETTINGS_DIR}.asgi' (requires 'pip install uvicorn')\n"
+    entry_str += f"    # For multiple workers use gunicorn: 'gunicorn {ctx.SETTINGS_DIR}.asgi:application -k uvicorn.workers.UvicornWorker'\n"
+    entry_str += "    import uvicorn\n\n"
+    entry_str += "    uvicorn.run(\n"
+    entry_str += "        application,\n"
+    entry_str += "        host=os.getenv('HOST', '127.0.0.1'),\n"
+    entry_str += "        port=int(os.getenv('PORT', '8000')),\n"
+    entry_str += "        lifespan='off',\n"
+    entry_str += "    )\n"
+    return content.rstrip('\n') + entry_str
+
+
+def update_urlpatterns_root(content: str, ctx: ScaffoldContext) -> str:
+    content = content.replace(
+        "from django.urls import path",
+        "from django.urls import include, path\nfrom django.conf import settings",
+        1
+    )
+
+    content = content.replace(
+        "path('admin/', admin.site.urls),",
+        f"path('admin/', admin.site.urls),\n\tpath('', include('{ctx.FIRSTAPP_DIR}.urls')),",
+        1
+    )
+    return content
+
+
+def add_static_to_urlpatterns_root(content: str, ctx: ScaffoldContext) -> str:
+    static_str = "\n\nif settings.DEBUG:\n"
+    static_str += "\tfrom django.conf.urls.static import static\n"
+    static_str += "\turlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)"
+
+    # Development only routes
+    for route, urls_module in ctx.URLPATTERNS_DEV:
+        static_str += f"\n\turlpatterns.append(path('{route}', include('{urls_module}')))"
+    return content + static_str
+
+
+def firstapp_urls_content(ctx: ScaffoldContext) -> str:
+    urls_str = "from django.urls import path, include\n"
+    urls_str += "from . import views\n\n"
+    urls_str += "urlpatterns = [\n"
+    urls_str += "\tpath('', views.index, name='home'),\n"
+    urls_str += "]"
+    return urls_str
+
+
+def update_urlpatterns_core(ctx: ScaffoldContext) -> None:
+    with open(ctx.path(ctx.firstapp_urls_path), "w") as file:
+        file.write(firstapp_urls_content(ctx))
+
+
+def add_index_view(content: str, ctx: ScaffoldContext) -> str:
+    """Adds the `index` view. HTMX requests render the page into `_partial.html`, so they only get its title and content instead of the full page."""
+    tree = ast.parse(content)
+    import_node = find_import_from(tree, "django.shortcuts") or last_import(tree)
+    content = insert_after_node(content, import_node, "from django.utils.cache import patch_vary_headers")
+
+    view_str = "def index(request):\n"
+    view_str += "\t# History restores need the full page, as HTMX swaps it in whole\n"
+    view_str += "\tpartial = request.htmx and not request.htmx.history_restore_request\n"
+    view_str += f"\tbase_template = '{ctx.FIRSTAPP_DIR}/_partial.html' if partial else '{ctx.FIRSTAPP_DIR}/_base.html'\n"
+    view_str += f"\tresponse = render(request, '{ctx.FIRSTAPP_DIR}/index.html', {{'base_template': base_template}})\n\n"
+    view_str += "\t# Keeps browser and proxy caches from mixing up the partial and full page\n"
+    view_str += "\tpatch_vary_headers(response, ('HX-Request',))\n"
+    view_str += "\treturn response\n"
+    return content.rstrip('\n') + '\n\n\n' + view_str
+
+
+def create_index_view_core(ctx: ScaffoldContext) -> None:
+    transform_file(ctx.path(ctx.firstapp_views_path), [partial(add_index_view, ctx=ctx)])
+
+
+def migrate_db(ctx: ScaffoldContext) -> None:
+    """Migrates the SQLite database. The first migrated database for each Django version, set of installed apps, migrations and database options is saved in `CACHE_DIR`, later projects get a copy of it instead of running `migrate`."""
+    record_django_command(ctx.django_worker.run_command("makemigrations"))
+
+    state = ctx.django_worker.migration_state()
+    if state["engine"] != "django.db.backends.sqlite3":
+        record_django_command(ctx.django_worker.run_command("migrate"))
+        return
+
+    snapshot = cache_entry_path(ctx.CACHE_DIR, "databases", files_key(extra=state))
+    snapshot_db = os.path.join(snapshot, "db.sqlite3")
+
+    with entry_lock(snapshot):
+        if ctx.refresh_cache or not os.path.isfile(snapshot_db):
+            record_django_command(ctx.django_worker.run_command("migrate"))
+            with build_entry(snapshot, replace=True) as tmp_dir:
+                record_django_command(ctx.django_worker.run_command("backup_database", os.path.join(tmp_dir, "db.sqlite3")))
+        else:
+            touch_entry(snapshot)
+            record_django_command(ctx.django_worker.run_command("restore_database", snapshot_db))
+
+    evict_cache(ctx.CACHE_DIR, ctx.CACHE_MAX_SIZE_MB, keep=(snapshot,))
+
+
+def create_superuser(ctx: ScaffoldContext) -> None:
+    record_django_command(ctx.django_worker.run_command("createsuperuser", "--noinput", "--username", ctx.SUPERUSER_NAME, "--email", ctx.SUPERUSER_EMAIL))
+
+
+def bundle_base_template_scripts(content: str) -> str:
+    """Moves the static scripts in `_base.html` into a single deferred `{% compress js %}` block, so they're served as one file. Their `preload` hints are removed, as the bundle replaces them."""
+    if "{% compress js %}" in content:
+        return content
+
+    pattern = r"[ \t]*<script [^>]*src=\"{% static '([^']*)' %}\"[^>]*></script>\n"
+    scripts = list(re.finditer(pattern, content))
+    if not scripts:
+        return content
+
+    for script in scripts:
+        preload = rf"[ \t]*<link rel=\"preload\" href=\"{{% static '{re.escape(script.group(1))}' %}}\" as=\"script\">\n"
+        content = re.sub(preload, '', content)
+    if "rel=\"preload\"" not in content:
+        content = re.sub(r"[ \t]*{#[^\n]*preloading[^\n]*#}\n(\s*\n)?", '', content)
+    scripts = list(re.finditer(pattern, content))
+
+    indent = re.match(r"[ \t]*", scripts[0].group()).group()
+    block = f"{indent}{{% compress js %}}\n"
+    for script in scripts:
+        tag = script.group().strip()
+        if " defer" not in tag:
+            tag = tag.replace("></script>", " defer></script>")
+        block += f"{indent}{tag}\n"
+    block += f"{indent}{{% endcompress %}}\n"
+
+    first = scripts[0].start()
+    for script in reversed(scripts):
+        content = content[:script.start()] + content[script.end():]
+    return content[:first] + block + content[first:]
+
+
+def build_production_assets(ctx: ScaffoldContext) -> None:
+    """In `--prod-assets` mode, bundles the base template's scripts, collects the static files with hashed names, compresses the templates offline and creates `.gz`/`.br` siblings for everything in `STATIC_ROOT`."""
+    base_template = ctx.path(ctx.base_template_path)
+    with open(base_template, "r") as file:
+        content = bundle_base_template_scripts(file.read())
+
+    # Replaced rather than written in place, as the template may be hardlinked to 'setup_assets'
+    tmp_path = f"{base_template}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as file:
+        file.write(content)
+    os.replace(tmp_path, base_template)
+
+    record_django_command(ctx.django_worker.run_command("collectstatic", "--noinput"))
+
+    # Offline bundles are looked up by their rendered content, which only matches production (hashed) URLs with 'DEBUG' off
+    run_command([os.path.join(ctx.venv_bin, "python"), "manage.py", "compress"], env={**os.environ, "DEBUG_MODE": "False"}, cwd=ctx.project_dir)
+
+    if brotli is None:
+        print("The 'brotli' package isn't installed, only creating '.gz' static files.")
+    precompress_dir(ctx.path(ctx.static_root))
+
+
+def apply_production_profile(ctx: ScaffoldContext) -> None:
+    """In the production profile, adds a server entry point to `config/asgi.py`."""
+    if ctx.settings_profile != 'production':
+        return
+
+    transform_file(ctx.path(ctx.asgi_path), [partial(add_asgi_server_entry, ctx=ctx)])
+
+
+def loadtest_content(ctx: ScaffoldContext) -> str:
+    """Returns the load test script from `setup_assets`, pointed at the project settings."""
+    with open(os.path.join(ctx.SETUP_ASSETS_PERFORMANCE_DIR, "loadtest.py"), "r") as file:
+        return file.read().replace('SETTINGS_MODULE = "config.settings"', f'SETTINGS_MODULE = "{ctx.SETTINGS_DIR}.settings"', 1)
+
+
+# Ordered `(content, ctx)` rules applied to 'config/settings.py' in memory, see `configure_settings_file()`
+SETTINGS_FILE_RULES = [
+    init_updates_to_settings_file,
+    update_secret_key,
+    update_installed_apps,
+    update_middleware,
+    add_staticfiles_config,
+    add_compressor_config,
+    add_production_static_config,
+    add_production_profile,
+    add_fragment_cache_config,
+    add_profiling_config,
+]
+
+
+# Ordered `(content, ctx)` rules applied to 'config/urls.py', see `configure_root_urls()`
+ROOT_URLS_FILE_RULES = [
+    update_urlpatterns_root,
+    add_static_to_urlpatterns_root,
+]
+
+
+def configure_settings_file(ctx: ScaffoldContext) -> None:
+    """Applies all updates to the `config/settings.py` file in a single read and atomic write."""
+    transform_file(ctx.path(ctx.settings_path), [partial(rule, ctx=ctx) for rule in SETTINGS_FILE_RULES])
+
+
+def configure_root_urls(ctx: ScaffoldContext) -> None:
+    transform_file(ctx.path(ctx.urls_path), [partial(rule, ctx=ctx) for rule in ROOT_URLS_FILE_RULES])
+
+
+def configure_firstapp(ctx: ScaffoldContext) -> None:
+    create_index_view_core(ctx)
+    update_urlpatterns_core(ctx)
+
+
+def setup_steps(ctx: ScaffoldContext) -> list[Step]:
+    """Returns the setup steps for a project, each one bound to its `ctx`.
+
+    Each step declares the resources it needs and provides, steps without a dependency between them run in parallel. The inputs, outputs (relative to the project directory) and in-place edits of each step decide what reruns with '--resume'. Their timeouts come from `STEP_TIMEOUTS`."""
+    steps = [
+        Step(
+            "venv", create_virtual_environment, provides=("venv",), message="Creating virtual environment...",
+            input_paths=(ctx.PIP_LOCKFILE,), outputs=("venv",)
+        ),
+        Step(
+            "pip", install_packages, needs=("venv",), provides=("packages",), message="Installing pip packages...",
+            inputs=("PIP_PACKAGES",), input_paths=(ctx.PIP_LOCKFILE,), modifies=("venv",)
+        ),
+        Step(
+            "requirements", create_requirements_txt, needs=("packages",), provides=("requirements.txt",), message="Creating 'requirements.txt'...",
+            outputs=("requirements.txt",)
+        ),
+        Step("django-worker", start_django_worker, needs=("packages",), provides=("django-worker",), message="Starting Django...", resumable=False),
+        Step(
+            "startproject", run_django_startproject, needs=("django-worker",), provides=("manage.py",), message="Creating Django project...",
+            inputs=("SETTINGS_DIR", "FIRSTAPP_DIR"), outputs=("manage.py", ctx.SETTINGS_DIR, ctx.FIRSTAPP_DIR)
+        ),
+        Step(
+            "assets", move_setup_assets_to_project, needs=("manage.py",), provides=("assets",), message="Creating static files and templates...",
+            inputs=("TEMPLATES_DIRS_ADDITIONS", "standalone_tailwind"),
+            input_paths=(ctx.SETUP_ASSETS_ROOT_DIR, ctx.SETUP_ASSETS_STATIC_DIR, ctx.SETUP_ASSETS_TEMPLATE_DIR, ctx.SETUP_ASSETS_PERFORMANCE_DIR),
+            outputs=(
+                ctx.static_dir, ctx.template_dir, ctx.TAILWIND_CONFIG_FILENAME, "loadtest.py",
+                os.path.join(ctx.FIRSTAPP_DIR, "profiling.py"), os.path.join(ctx.FIRSTAPP_DIR, "test_performance.py")
+            )
+        ),
+        Step(
+            "settings", configure_settings_file, needs=("manage.py",), provides=("settings",), message=f"Updating '{ctx.settings_path}'...",
+            inputs=(
+                "TEMPLATES_DIRS_ADDITIONS", "INSTALLED_APPS_3RDPARTY", "INSTALLED_APPS_LOCAL", "MIDDLEWARE_3RDPARTY", "STATIC_URL", "STATIC_ROOT_DIR",
+                "NEW_STATICFILES_DIRS", "STATICFILES_DEFAULT_FINDERS", "NEW_STATICFILES_3RDPARTY_FINDERS", "prod_assets",
+                "settings_profile", "INSTALLED_APPS_DEV", "MIDDLEWARE_DEV"
+            ),
+            modifies=("manage.py",)
+        ),
+        Step(
+            "env", generate_env_file, needs=("django-worker",), provides=(".env",), message="Generating '.env' file...",
+            inputs=("SUPERUSER_PASSWORD", "ENV_FILE_ADDITIONAL_PARAMS", "settings_profile"), outputs=(".env",)
+        ),
+        Step(
+            "npm", configure_npm_assets, needs=("assets",), provides=("node_modules",), message="Installing Tailwind CSS...",
+            inputs=("NPM_DEV_PACKAGES", "NPM_PACKAGES", "standalone_tailwind", "TAILWIND_STANDALONE_VERSION", "STANDALONE_JS_LIBRARIES"), input_paths=(ctx.NPM_LOCKFILE,),
+            outputs=("node_modules", "package.json", "package-lock.json", ctx.TAILWIND_STANDALONE_FILENAME)
+        ),
+        Step(
+            "js-libraries", download_js_libraries_to_static, needs=("assets",), provides=("js-libraries",), message="Downloading JS libraries...",
+            inputs=("JS_LIBRARIES", "offline_mirror"), input_paths=(ctx.JS_LIBRARIES_LOCKFILE,)
+        ),
+        Step("npm-libraries", copy_npm_libraries_to_static, needs=("node_modules",), provides=("npm-libraries",), message="Copying AlpineJS and Flowbite..."),
+        Step("urls", configure_root_urls, needs=("manage.py",), provides=("urls",), message=f"Updating '{ctx.urls_path}'...", inputs=("URLPATTERNS_DEV",), modifies=("manage.py",)),
+        Step("firstapp", configure_firstapp, needs=("manage.py",), provides=("views",), message=f"Updating '{ctx.FIRSTAPP_DIR}'...", modifies=("manage.py",)),
+        Step(
+            "profile", apply_production_profile, needs=("manage.py",), provides=("profile",), message="Applying the production profile...",
+            inputs=("settings_profile",), modifies=("manage.py",)
+        ),
+        Step(
+            "migrate", migrate_db, needs=("django-worker", "settings", ".env", "urls", "views", "profile"), provides=("db",), message="Migrating database...",
+            outputs=("db.sqlite3", "db.sqlite3-wal", "db.sqlite3-shm")
+        ),
+        Step(
+            "superuser", create_superuser, needs=("django-worker", "db"), provides=("superuser",), message="Creating superuser...",
+            inputs=("SUPERUSER_NAME", "SUPERUSER_EMAIL"), modifies=("db",)
+        ),
+    ]
+    if ctx.prod_assets:
+        steps.append(Step(
+            "prod-assets", build_production_assets, needs=("django-worker", "db", "js-libraries", "npm-libraries"), provides=("prod-assets",),
+            message="Building production static files...", inputs=("STATIC_ROOT_DIR",), outputs=(ctx.static_root,)
+        ))
+    return [
+        dataclasses.replace(step, func=partial(step.func, ctx), timeout=ctx.STEP_TIMEOUTS.get(step.name, ctx.STEP_TIMEOUTS.get("default")))
+        for step in steps
+    ]
+
+
+def run_setup(ctx: ScaffoldContext, resume: bool = False) -> dict[str, float]:
+    """Runs the setup steps in the project directory of `ctx`. Each step and command is recorded to `SETUP_EVENTS_PATH`, with command output in `SETUP_LOGS_DIR`.
+
+    Finished steps are checkpointed to `SETUP_JOURNAL_PATH`. When resuming, only the steps that never finished or whose inputs changed are rerun (with the steps affected by them)."""
+    start = time.perf_counter()
+    all_steps = setup_steps(ctx)
+    hashes = {step.name: step_input_hash(step, ctx.values()) for step in all_steps}
+    journal = Journal(ctx.path(ctx.SETUP_JOURNAL_PATH), hashes, fresh=not resume)
+
+    steps = all_steps
+    if resume:
+        to_run = plan_resume(all_steps, journal.entries, hashes)
+        steps = [step for step in all_steps if step.name in to_run]
+        print(f"Resuming setup: {len(all_steps) - len(steps)} steps already complete, {len(steps)} to run.\n")
+
+        for step in steps:
+            remove_outputs(step, ctx.project_dir)
+
+    skipped = [step for step in all_steps if step not in steps]
+    available = tuple(resource for step in skipped for resource in step.provides)
+
+    try:
+        with instrumented([step.name for step in all_steps], ctx.path(ctx.SETUP_EVENTS_PATH), ctx.path(ctx.SETUP_LOGS_DIR), cwd=ctx.project_dir) as instrumentation:
+            instrumentation.steps_skipped([step.name for step in skipped])
+            timings = run_steps(steps, available=available, listeners=(instrumentation, journal))
+    finally:
+        if ctx.django_worker is not None:
+            ctx.django_worker.close()
+            ctx.django_worker = None
+
+        # Recorded even when a step failed, so the files written so far can be repaired with 'update'
+        if os.path.isdir(ctx.project_dir):
+            record_generated(ctx)
+
+    # End of script
+    print(f"Setup completed successfully in {time.perf_counter() - start:.2f}s. Step events saved to '{ctx.SETUP_EVENTS_PATH}'.")
+    return timings
+
+
+# Updating existing projects
+def __django_file_rules(ctx: ScaffoldContext) -> dict[str, list]:
+    """Helper function for `generated_files()`. Returns the ordered `(content, ctx)` rules applied to each file created by `startproject` and `startapp`, by path relative to the project."""
+    return {
+        ctx.settings_path: SETTINGS_FILE_RULES,
+        ctx.urls_path: ROOT_URLS_FILE_RULES,
+        ctx.asgi_path: [add_asgi_server_entry] if ctx.settings_profile == 'production' else [],
+        ctx.firstapp_views_path: [add_index_view],
+    }
+
+
+def __django_project_files(ctx: ScaffoldContext) -> dict[str, str]:
+    """Helper function for `update_project()`. Returns the files `startproject` and `startapp` create, before the setup edits them, by path relative to the project. They're created with the project's Django in a temporary folder."""
+    python = os.path.join(ctx.venv_bin, "python")
+
+    # Both are created below folders that aren't valid module names, so they can't clash with the names Django checks
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        project_dir, app_dir = os.path.join(tmp_dir, "project-files"), os.path.join(tmp_dir, "app-files", ctx.FIRSTAPP_DIR)
+        os.makedirs(project_dir)
+        os.makedirs(app_dir)
+        run_command([python, "-m", "django", "startproject", ctx.SETTINGS_DIR, project_dir], cwd=tmp_dir)
+        run_command([python, "-m", "django", "startapp", ctx.FIRSTAPP_DIR, app_dir], cwd=tmp_dir)
+
+        files = {}
+        for path in __django_file_rules(ctx):
+            if path == ctx.firstapp_views_path:
+                source = os.path.join(app_dir, os.path.relpath(path, ctx.FIRSTAPP_DIR))
+            else:
+                source = os.path.join(project_dir, path)
+            with open(source, "r") as file:
+                files[path] = file.read()
+    return files
+
+
+def project_secret_key(ctx: ScaffoldContext) -> str:
+    """Returns the project's secret key from its `.env` file (or the recorded copy), so regenerating it never changes the key. Projects without one get a new key."""
+    for path in (ctx.path(".env"), ctx.path(ctx.SETUP_GENERATED_DIR, ".env")):
+        if os.path.isfile(path):
+            with open(path, "r") as file:
+                for line in file:
+                    if line.startswith("DJANGO_SECRET_KEY="):
+                        return line.split('=', 1)[1].strip()
+    return random_secret_key()
+
+
+def generated_files(ctx: ScaffoldContext, django_files: dict[str, str], secret_key: str) -> dict[str, bytes]:
+    """Returns the content of every file the setup generates, by path relative to the project: the `django_files` with the setup's edits applied, the files it creates and the `setup_assets` items."""
+    files = {}
+    for path, rules in __django_file_rules(ctx).items():
+        content = django_files[path]
+        for rule in rules:
+            content = rule(content, ctx)
+        files[path] = content
+
+    files[ctx.firstapp_urls_path] = firstapp_urls_content(ctx)
+    files[".env"] = env_file_content(ctx, secret_key)
+    files[ctx.TAILWIND_CONFIG_FILENAME] = tailwind_config_content(ctx)
+    files["loadtest.py"] = loadtest_content(ctx)
+    files = {path: content.encode() for path, content in files.items()}
+
+    for src, dest in asset_copies(ctx):
+        path = os.path.relpath(dest, ctx.project_dir)
+        with open(src, "rb") as file:
+            files[path] = file.read()
+
+        if ctx.prod_assets and path == ctx.base_template_path:
+            files[path] = bundle_base_template_scripts(files[path].decode()).encode()
+    return files
+
+
+def generated_paths(ctx: ScaffoldContext) -> list[str]:
+    """Returns the paths of the files in `generated_files()`, relative to the project."""
+    paths = [*__django_file_rules(ctx), ctx.firstapp_urls_path, ".env", ctx.TAILWIND_CONFIG_FILENAME, "loadtest.py"]
+    return paths + [os.path.relpath(dest, ctx.project_dir) for _, dest in asset_copies(ctx)]
+
+
+def record_generated(ctx: ScaffoldContext) -> None:
+    """Records the generated files in `SETUP_GENERATED_DIR`, with the settings overrides and options they were generated with, for `update_project()`. The folder names are always recorded, as they can't be updated.
+
+    Only the files written so far are recorded, as they are on disk. After a failed setup, `update_project()` creates the missing ones and finishes the edits to the rest."""
+    defaults = json.loads(json.dumps(default_settings(), default=str))
+    settings = json.loads(json.dumps(ctx.settings, default=str))
+    manifest = {
+        "options": {"prod_assets": ctx.prod_assets, "settings_profile": ctx.settings_profile, "standalone_tailwind": ctx.standalone_tailwind},
+        "overrides": {
+            name: value for name, value in settings.items()
+            if value != defaults.get(name) or name in ("SETTINGS_DIR", "FIRSTAPP_DIR")
+        },
+    }
+    record_files(ctx.project_dir, ctx.path(ctx.SETUP_GENERATED_DIR), generated_paths(ctx), manifest, ctx.path(ctx.SETUP_GENERATED_MANIFEST_PATH))
+
+
+def project_context(project_dir: str) -> ScaffoldContext:
+    """Returns the context of an existing project: the current `config.py` settings, with the overrides and options it was set up with. Raises a `FileNotFoundError` for projects set up without a record of their generated files."""
+    manifest = load_manifest(os.path.join(project_dir, SETUP_GENERATED_MANIFEST_PATH))
+    if manifest is None:
+        raise FileNotFoundError(f"'{project_dir}' has no record of its generated files. Only projects set up with this version of the tool can be updated.")
+
+    defaults = default_settings()
+    overrides = {name: value for name, value in manifest["overrides"].items() if name in defaults}
+    return ScaffoldContext.from_config(project_dir, overrides, **manifest["options"])
+
+
+def update_project(ctx: ScaffoldContext) -> dict[str, str]:
+    """Re-applies the settings to an existing project without setting it up again. Every generated file is rendered with the current settings, and only what changed since the last setup (or update) is merged into the project, keeping any edits made to it. Running it again with the same settings changes nothing.
+
+    Returns the outcome for each file that changed or conflicted, see `merge_files()`. Conflicting files are left as they are."""
+    desired = generated_files(ctx, __django_project_files(ctx), project_secret_key(ctx))
+    outcomes = merge_files(ctx.project_dir, ctx.path(ctx.SETUP_GENERATED_DIR), desired)
+
+    for path, outcome in outcomes.items():
+        print(f"  {outcome:<10} {path}")
+
+    conflicts = [path for path, outcome in outcomes.items() if outcome == 'conflict']
+    if conflicts:
+        print(f"\n{len(conflicts)} file(s) have edits that overlap the changes and were left as they are, apply the changes to them by hand.")
+    print(f"Project updated: {len(outcomes) - len(conflicts)} file(s) changed.")
+    return outcomes
@@ -0,0 +1,146 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class Step:
+    """A single setup step. `needs` lists the resources that must exist before it can run, `provides` lists the ones it creates.
+
+    For resuming a setup: `inputs` names the settings it depends on, `input_paths` the files it reads, `outputs` the files and folders it creates (removed before a rerun) and `modifies` the resources it edits in place. Steps that aren't `resumable` (e.g. running processes) always run when needed.
+
+    Commands a step runs are stopped once it has been running for `timeout` seconds."""
+    name: str
+    func: Callable[[], None]
+    needs: tuple[str, ...] = ()
+    provides: tuple[str, ...] = ()
+    message: str = ''
+    inputs: tuple[str, ...] = ()
+    input_paths: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    modifies: tuple[str, ...] = ()
+    resumable: bool = True
+    timeout: float | None = None
+
+
+@dataclass
+class StepRun:
+    """A step running in the current thread, see `current_step_run()`. `cancelled` is set for every step of a run when one of them fails."""
+    step: Step
+    deadline: float | None
+    cancelled: threading.Event
+
+    def remaining(self) -> float | None:
+        """Returns the seconds left before the step's deadline, or `None` if it doesn't have one."""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+
+# The step each thread is running, set by `run_steps()`
+running = threading.local()
+
+
+def current_step_run() -> StepRun | None:
+    """Returns the step running in the current thread, or `None` outside of `run_steps()`."""
+    return getattr(running, "step_run", None)
+
+
+def __timed_run(step: Step, listeners: tuple, cancelled: threading.Event) -> float:
+    """Helper function for `run_steps()`. Runs a step and returns its duration in seconds. The `listeners` are told when the step starts and finishes, from the thread running it."""
+    if not listeners and step.message:
+        print(step.message)
+    for listener in listeners:
+        listener.step_started(step)
+
+    start = time.perf_counter()
+    deadline = None if step.timeout is None else time.monotonic() + step.timeout
+    running.step_run = StepRun(step, deadline, cancelled)
+    try:
+        step.func()
+    except Exception as e:
+        for listener in listeners:
+            listener.step_finished(step, time.perf_counter() - start, e)
+        raise
+    finally:
+        running.step_run = None
+
+    duration = time.perf_counter() - start
+    for listener in listeners:
+        listener.step_finished(step, duration, None)
+    return duration
+
+
+def validate_steps(steps: list[Step], available: tuple[str, ...] = ()) -> None:
+    """Checks that every step name is unique and that every resource a step needs is provided by another step, or is already `available`."""
+    names = [step.name for step in steps]
+    duplicates = {name for name in names if names.count(name) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate step names: {sorted(duplicates)}.")
+
+    provided = set(available) | {resource for step in steps for resource in step.provides}
+    for step in steps:
+        missing = set(step.needs) - provided
+        if missing:
+            raise ValueError(f"Step '{step.name}' needs {sorted(missing)}, which no step provides.")
+
+
+def required_steps(steps: list[Step], names: list[str]) -> list[str]:
+    """Returns the names of every step that the steps in `names` depend on, directly or indirectly, in declaration order. The steps in `names` are excluded."""
+    providers = {resource: step for step in steps for resource in step.provides}
+    required = set()
+    queue = [step for step in steps if step.name in names]
+
+    while queue:
+        step = queue.pop()
+        for resource in step.needs:
+            provider = providers[resource]
+            if provider.name not in required:
+                required.add(provider.name)
+                queue.append(provider)
+
+    return [step.name for step in steps if step.name in required and step.name not in names]
+
+
+def run_steps(steps: list[Step], max_workers: int | None = None, available: tuple[str, ...] = (), listeners: tuple = ()) -> dict[str, float]:
+    """Runs the `steps` on a thread pool, starting each one as soon as everything it needs is available. Resources in `available` already exist. `listeners` with `step_started(step)` and `step_finished(step, duration, error)` methods can follow their progress. Returns the duration of each step, in completion order.
+
+    When a step fails (or the run is interrupted), no more steps are started and the commands of the ones still running are stopped, see `current_step_run()`."""
+    validate_steps(steps, available)
+
+    pending = list(steps)
+    available = set(available)
+    in_progress = {}
+    timings = {}
+    cancelled = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        try:
+            while pending or in_progress:
+                ready = [step for step in pending if set(step.needs) <= available]
+                for step in ready:
+                    pending.remove(step)
+                    # Each step runs in a copy of the caller's context, so it sees the run's context variables (such as its instrumentation)
+                    in_progress[pool.submit(contextvars.copy_context().run, __timed_run, step, tuple(listeners), cancelled)] = step
+
+                if not in_progress:
+                    raise RuntimeError(f"Steps can never run, check for circular needs: {[step.name for step in pending]}.")
+
+                done, _ = wait(in_progress, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = in_progress.pop(future)
+                    try:
+                        timings[step.name] = future.result()
+                    except Exception as e:
+                        raise RuntimeError(f"Step '{step.name}' failed: {e}") from e
+
+                    available.update(step.provides)
+        except BaseException:
+            # Set before the pool waits for the running steps, so they stop early
+            pending.clear()
+            cancelled.set()
+            raise
+
+    return timings
+
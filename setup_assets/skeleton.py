@@ -0,0 +1,125 @@
+import ast
+import glob
+import json
+import os
+import re
+import secrets
+import shutil
+import string
+
+from setup_assets.cache import build_entry, entry_lock, touch_entry
+from setup_assets.source_edit import find_assignment
+
+
+# Django's templates for 'startproject' and 'startapp', in its 'conf' folder
+DJANGO_TEMPLATE_DIRS = {"project_template": "project_name", "app_template": "app_name"}
+
+# The templates only use plain variables, anything else is rejected rather than rendered wrong
+TEMPLATE_VARIABLE = re.compile(r"{{ *(\w+) *}}")
+TEMPLATE_TAG = re.compile(r"{%|{#")
+
+# Same characters as Django's `get_random_secret_key()`
+SECRET_KEY_CHARS = string.ascii_lowercase + string.digits + "!@#$%^&*(-_=+)"
+
+VERSIONS_FILENAME = "versions.json"
+
+
+def __django_versions(version: tuple) -> dict[str, str]:
+    """Helper function for `save_django_templates()` and `load_django_templates()`. Returns the `django_version` and `docs_version` the templates are rendered with, from a `django.VERSION` tuple."""
+    major, minor, micro, level, serial = version
+    main = f"{major}.{minor}" if micro == 0 else f"{major}.{minor}.{micro}"
+    suffixes = {"alpha": "a", "beta": "b", "rc": "rc"}
+
+    if level == "final":
+        return {"django_version": main, "docs_version": f"{major}.{minor}"}
+    return {"django_version": f"{main}{suffixes.get(level, '.dev')}{serial}", "docs_version": "dev"}
+
+
+def __render(content: str, context: dict[str, str], path: str) -> str:
+    """Helper function for `django_skeleton()`. Fills in the `{{ variable }}` placeholders of a Django template file."""
+    if TEMPLATE_TAG.search(content):
+        raise ValueError(f"'{path}' uses template tags, which can't be rendered without Django.")
+
+    def replace(match: re.Match) -> str:
+        if match.group(1) not in context:
+            raise ValueError(f"'{path}' uses an unknown template variable '{match.group(1)}'.")
+        return context[match.group(1)]
+
+    return TEMPLATE_VARIABLE.sub(replace, content)
+
+
+def random_secret_key() -> str:
+    """Returns a new secret key, in the same format as Django's `get_random_secret_key()`."""
+    return ''.join(secrets.choice(SECRET_KEY_CHARS) for _ in range(50))
+
+
+def venv_django_dir(venv_dir: str) -> str | None:
+    """Returns the folder Django is installed in, in a virtual environment, or `None` if it isn't."""
+    matches = glob.glob(os.path.join(venv_dir, "lib", "python*", "site-packages", "django"))
+    matches += glob.glob(os.path.join(venv_dir, "Lib", "site-packages", "django"))
+    return matches[0] if matches else None
+
+
+def save_django_templates(django_dir: str, entry: str) -> None:
+    """Copies the `startproject` and `startapp` templates of an installed Django into the cache `entry`, along with the versions they're rendered with. Kept for `load_django_templates()`, so the project skeleton can be rendered without Django."""
+    with entry_lock(entry):
+        if os.path.isdir(entry):
+            touch_entry(entry)
+            return
+
+        with open(os.path.join(django_dir, "__init__.py"), "r") as file:
+            version = ast.literal_eval(find_assignment(ast.parse(file.read()), "VERSION").value)
+
+        with build_entry(entry) as tmp_dir:
+            for name in DJANGO_TEMPLATE_DIRS:
+                shutil.copytree(os.path.join(django_dir, "conf", name), os.path.join(tmp_dir, name), ignore=shutil.ignore_patterns("__pycache__"))
+            with open(os.path.join(tmp_dir, VERSIONS_FILENAME), "w") as file:
+                json.dump(__django_versions(version), file)
+
+
+def load_django_templates(entry: str) -> tuple[str, dict[str, str]]:
+    """Returns the folder holding Django's `startproject` and `startapp` templates and the versions they're rendered with. Uses the copy cached by `save_django_templates()` (matching the Django the setup installs), falling back to the Django installed for this Python."""
+    if os.path.isfile(os.path.join(entry, VERSIONS_FILENAME)):
+        touch_entry(entry)
+        with open(os.path.join(entry, VERSIONS_FILENAME), "r") as file:
+            return entry, json.load(file)
+
+    try:
+        import django
+    except ImportError:
+        raise FileNotFoundError("Django's project templates aren't cached for the 'PIP_PACKAGES' yet. Create a project with them first, or install Django for this Python.")
+
+    return os.path.join(os.path.dirname(django.__file__), "conf"), __django_versions(django.VERSION)
+
+
+def django_skeleton(templates_dir: str, versions: dict[str, str], settings_dir: str, firstapp_dir: str) -> dict[str, str]:
+    """Renders the files `startproject` and `startapp` create from the templates in `templates_dir` (see `load_django_templates()`), by path relative to the project. Works like Django's `TemplateCommand`: `.py-tpl` files are rendered and renamed, the rest are copied."""
+    names = {"project_name": settings_dir, "app_name": firstapp_dir}
+    context = {
+        **versions,
+        **names,
+        "camel_case_app_name": ''.join(char for char in firstapp_dir.title() if char != '_'),
+        "secret_key": f"django-insecure-{random_secret_key()}",
+    }
+    # The app is created in its own folder, the project's settings package is named after the project
+    destinations = {"project_template": '', "app_template": firstapp_dir}
+
+    files = {}
+    for template_name, placeholder in DJANGO_TEMPLATE_DIRS.items():
+        template_root = os.path.join(templates_dir, template_name)
+        for dirpath, dirnames, filenames in os.walk(template_root):
+            dirnames[:] = [name for name in dirnames if name != "__pycache__"]
+
+            for filename in filenames:
+                src = os.path.join(dirpath, filename)
+                parts = os.path.relpath(src, template_root).split(os.sep)
+                parts = [names[placeholder] if part == placeholder else part for part in parts]
+                path = os.path.join(destinations[template_name], *parts)
+
+                with open(src, "r") as file:
+                    content = file.read()
+                if path.endswith(".py-tpl"):
+                    path, content = path[:-len("-tpl")], __render(content, context, src)
+                files[path] = content
+
+    return files
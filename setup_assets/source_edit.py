@@ -0,0 +1,90 @@
+import ast
+import os
+from typing import Callable
+
+
+def __line_starts(source: str) -> list[int]:
+    """Helper function for `node_span()`. Returns the string offset of the start of each line in `source`."""
+    starts = [0]
+    for line in source.splitlines(keepends=True):
+        starts.append(starts[-1] + len(line))
+    return starts
+
+
+def __to_offset(source: str, line_starts: list[int], lineno: int, col_offset: int) -> int:
+    """Helper function for `node_span()`. Converts an AST position into a string offset. AST column offsets are in UTF-8 bytes, not characters."""
+    line_start = line_starts[lineno - 1]
+    line = source[line_start:line_starts[lineno]] if lineno < len(line_starts) else source[line_start:]
+    return line_start + len(line.encode('utf-8')[:col_offset].decode('utf-8', errors='ignore'))
+
+
+def node_span(source: str, node: ast.AST) -> tuple[int, int]:
+    """Returns the start and end string offsets of an AST `node` in `source`."""
+    line_starts = __line_starts(source)
+    start = __to_offset(source, line_starts, node.lineno, node.col_offset)
+    end = __to_offset(source, line_starts, node.end_lineno, node.end_col_offset)
+    return start, end
+
+
+def find_assignment(tree: ast.Module, name: str) -> ast.Assign | ast.AnnAssign | None:
+    """Returns the last top-level assignment to `name`, if one exists."""
+    found = None
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(target, ast.Name) and target.id == name for target in node.targets):
+            found = node
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name) and node.target.id == name:
+            found = node
+    return found
+
+
+def find_import_from(tree: ast.Module, module: str) -> ast.ImportFrom | None:
+    """Returns the first top-level `from <module> import ...` statement, if one exists."""
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module == module:
+            return node
+    return None
+
+
+def last_import(tree: ast.Module) -> ast.Import | ast.ImportFrom | None:
+    """Returns the last top-level import statement in the leading block of imports (and docstring), if one exists."""
+    found = None
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            found = node
+        elif not (isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant)):
+            break
+    return found
+
+
+def replace_node(source: str, node: ast.AST, text: str) -> str:
+    """Replaces the source code of `node` with `text`."""
+    start, end = node_span(source, node)
+    return source[:start] + text + source[end:]
+
+
+def insert_after_node(source: str, node: ast.AST | None, text: str) -> str:
+    """Inserts `text` on the lines following the statement `node`. Inserts at the start of `source` when `node` is `None`."""
+    if node is None:
+        return text + '\n' + source
+
+    _, end = node_span(source, node)
+    line_end = source.find('\n', end)
+    if line_end == -1:
+        return source + '\n' + text
+    return source[:line_end + 1] + text + '\n' + source[line_end + 1:]
+
+
+def transform_file(path: str, rules: list[Callable[[str], str]]) -> None:
+    """Reads the Python file at `path` once, applies each rule to its content in order and writes the result back in a single atomic replace. The result must be valid Python, otherwise the file is left untouched."""
+    with open(path, "r") as file:
+        content = file.read()
+
+    for rule in rules:
+        content = rule(content)
+
+    ast.parse(content, filename=path)
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as file:
+        file.write(content)
+    os.replace(tmp_path, path)
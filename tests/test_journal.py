@@ -0,0 +1,65 @@
+from setup_assets.journal import Journal, plan_resume, step_input_hash
+from setup_assets.scheduler import Step
+
+
+def noop() -> None:
+    pass
+
+
+STEPS = [
+    Step("venv", noop, provides=("venv",), inputs=("PYTHON",)),
+    Step("worker", noop, needs=("venv",), provides=("worker",), resumable=False),
+    Step("project", noop, needs=("venv",), provides=("project",)),
+    Step("settings", noop, needs=("project",), provides=("settings",), inputs=("APPS",), modifies=("project",)),
+    Step("migrate", noop, needs=("worker", "settings"), provides=("db",)),
+    Step("readme", noop, provides=("readme",), input_paths=()),
+]
+
+
+def finished_journal(tmp_path, hashes: dict[str, str]) -> Journal:
+    journal = Journal(str(tmp_path / "journal.json"), hashes)
+    for step in STEPS:
+        journal.step_started(step)
+        journal.step_finished(step, 0.1, None)
+    return Journal(str(tmp_path / "journal.json"), hashes)
+
+
+def test_nothing_reruns_when_nothing_changed(tmp_path):
+    hashes = {step.name: step_input_hash(step, {"PYTHON": "3.12", "APPS": ["a"]}) for step in STEPS}
+    journal = finished_journal(tmp_path, hashes)
+
+    assert "worker" not in journal.entries
+    assert plan_resume(STEPS, journal.entries, hashes) == []
+
+
+def test_config_change_reruns_the_step_and_everything_after_it(tmp_path):
+    namespace = {"PYTHON": "3.12", "APPS": ["a"]}
+    journal = finished_journal(tmp_path, {step.name: step_input_hash(step, namespace) for step in STEPS})
+
+    hashes = {step.name: step_input_hash(step, {**namespace, "APPS": ["a", "b"]}) for step in STEPS}
+    # The settings edit the project in place, so it's created again; the worker isn't resumable but migrate needs it
+    assert plan_resume(STEPS, journal.entries, hashes) == ["worker", "project", "settings", "migrate"]
+
+
+def test_input_file_change_reruns_the_step(tmp_path):
+    template = tmp_path / "template.txt"
+    template.write_text("one")
+    steps = [Step("render", noop, provides=("page",), input_paths=(str(template),))]
+
+    journal = Journal(str(tmp_path / "journal.json"), {"render": step_input_hash(steps[0], {})})
+    journal.step_finished(steps[0], 0.1, None)
+    assert plan_resume(steps, journal.entries, {"render": step_input_hash(steps[0], {})}) == []
+
+    template.write_text("two")
+    assert plan_resume(steps, journal.entries, {"render": step_input_hash(steps[0], {})}) == ["render"]
+
+
+def test_failed_and_unfinished_steps_rerun(tmp_path):
+    hashes = {step.name: step_input_hash(step, {"PYTHON": "3.12", "APPS": ["a"]}) for step in STEPS}
+    journal = finished_journal(tmp_path, hashes)
+
+    journal.step_started(STEPS[-1])
+    journal.step_started(STEPS[3])
+    journal.step_finished(STEPS[3], 0.1, RuntimeError("failed"))
+
+    assert plan_resume(STEPS, journal.entries, hashes) == ["worker", "project", "settings", "migrate", "readme"]
@@ -0,0 +1,83 @@
+from setup_assets.merge import merge_content, merge_files, merge_lines, record_files
+
+
+def lines(text: str) -> list[str]:
+    return text.splitlines(keepends=True)
+
+
+def test_unedited_file_takes_the_new_version():
+    base = lines("a\nb\n")
+    assert merge_lines(base, base, lines("a\nc\n")) == lines("a\nc\n")
+
+
+def test_edits_away_from_the_change_are_kept():
+    base = lines("a\nb\nc\nd\n")
+    current = lines("a\nb\nc\nd\nmine\n")
+    desired = lines("A\nb\nc\nd\n")
+    assert merge_lines(base, current, desired) == lines("A\nb\nc\nd\nmine\n")
+
+
+def test_change_to_an_edited_line_conflicts():
+    base = lines("a\nb\nc\n")
+    current = lines("a\nmine\nc\n")
+    desired = lines("a\ntheirs\nc\n")
+    assert merge_lines(base, current, desired) is None
+
+
+def test_removed_line_that_was_edited_conflicts():
+    base = lines("a\nb\nc\n")
+    current = lines("a\nmine\nc\n")
+    desired = lines("a\nc\n")
+    assert merge_lines(base, current, desired) is None
+
+
+def test_insertions_at_the_same_anchor_keep_both():
+    # The generated lines go straight after the anchor, before the ones added by hand
+    base = lines("a\nb\n")
+    current = lines("a\nmine\nb\n")
+    desired = lines("a\ntheirs\nb\n")
+    assert merge_lines(base, current, desired) == lines("a\ntheirs\nmine\nb\n")
+
+
+def test_insertion_after_an_edited_line_anchors_on_the_next_line():
+    base = lines("a\nb\n")
+    current = lines("A\nmine\nb\n")
+    desired = lines("a\ntheirs\nb\n")
+    assert merge_lines(base, current, desired) == lines("A\nmine\ntheirs\nb\n")
+
+
+def test_insertion_between_two_edited_lines_conflicts():
+    base = lines("a\nb\n")
+    current = lines("A\nB\n")
+    desired = lines("a\ntheirs\nb\n")
+    assert merge_lines(base, current, desired) is None
+
+
+def test_missing_files():
+    # Removed by the user, stays removed
+    assert merge_content(b"a\n", None, b"b\n") == (None, False)
+    # No longer generated, only removed when unedited
+    assert merge_content(b"a\n", b"a\n", None) == (None, False)
+    assert merge_content(b"a\n", b"mine\n", None) == (b"mine\n", False)
+    # Newly generated over a file the user created
+    assert merge_content(None, b"mine\n", b"theirs\n") == (b"mine\n", True)
+
+
+def test_merge_files_leaves_conflicts_and_their_records(tmp_path):
+    root, records = tmp_path / "project", tmp_path / "records"
+    root.mkdir()
+    (root / "clean.py").write_text("a\nb\n")
+    (root / "edited.py").write_text("a\nmine\n")
+    record_files(str(root), str(records), ["clean.py", "edited.py"], {}, str(tmp_path / "manifest.json"))
+    (records / "edited.py").write_text("a\nb\n")
+
+    outcomes = merge_files(str(root), str(records), {"clean.py": b"a\nc\n", "edited.py": b"a\nc\n", "new.py": b"new\n"})
+
+    assert outcomes == {"clean.py": "updated", "edited.py": "conflict", "new.py": "created"}
+    assert (root / "clean.py").read_text() == "a\nc\n"
+    assert (root / "edited.py").read_text() == "a\nmine\n"
+    assert (records / "edited.py").read_text() == "a\nb\n"
+    assert (records / "new.py").read_text() == "new\n"
+
+    # Merging again with the same contents changes nothing
+    assert merge_files(str(root), str(records), {"clean.py": b"a\nc\n", "edited.py": b"a\nc\n", "new.py": b"new\n"}) == {"edited.py": "conflict"}
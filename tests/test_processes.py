@@ -0,0 +1,48 @@
+import sys
+
+import pytest
+
+from setup_assets.processes import CommandError, OutputTail, run_process
+
+
+def test_tail_keeps_everything_under_the_limit():
+    tail = OutputTail(max_bytes=10)
+    tail.write(b"abc")
+    tail.write(b"def")
+    assert tail.text() == "abcdef"
+
+
+def test_tail_wraps_around():
+    tail = OutputTail(max_bytes=10)
+    for chunk in (b"0123", b"4567", b"89ab", b"cdef"):
+        tail.write(chunk)
+
+    assert tail.text() == "[...]\n6789abcdef"
+    assert tail.total == 16
+    # Whole chunks are only dropped while the rest still fills the buffer
+    assert tail.size < 10 + 4
+
+
+def test_tail_single_chunk_over_the_limit():
+    tail = OutputTail(max_bytes=4)
+    tail.write(b"0123456789")
+    assert tail.text() == "[...]\n6789"
+    assert tail.size == 4
+
+
+def test_tail_of_a_failed_command():
+    code = "import sys; sys.stderr.write('x' * 100000 + 'the end'); sys.exit(3)"
+    result = run_process([sys.executable, "-c", code])
+
+    assert result.returncode == 3
+    assert result.stderr_bytes == 100007
+    with pytest.raises(CommandError) as error:
+        result.check()
+    assert str(error.value).endswith("the end")
+    assert len(error.value.output) < 20000
+
+
+def test_timed_out_command():
+    result = run_process([sys.executable, "-c", "import time; time.sleep(30)"], timeout=1)
+    assert result.reason == "timed out after 1s"
+    assert result.duration < 10
@@ -0,0 +1,68 @@
+import ast
+
+import pytest
+
+from setup_assets.context import ScaffoldContext
+from setup_assets.scaffold import update_installed_apps
+from setup_assets.source_edit import find_assignment, insert_after_node, replace_node, transform_file
+
+
+SETTINGS = """from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+]
+TITLE: str = 'Café'  # non-ASCII before the end of the line
+"""
+
+
+def test_find_assignment_missing_name():
+    assert find_assignment(ast.parse(SETTINGS), "MIDDLEWARE") is None
+    assert isinstance(find_assignment(ast.parse(SETTINGS), "TITLE"), ast.AnnAssign)
+
+
+def test_replace_node_after_non_ascii_text():
+    node = find_assignment(ast.parse(SETTINGS), "TITLE")
+    assert replace_node(SETTINGS, node, "TITLE = 'Tea'").endswith("TITLE = 'Tea'  # non-ASCII before the end of the line\n")
+
+
+def test_insert_after_node():
+    source = insert_after_node(SETTINGS, find_assignment(ast.parse(SETTINGS), "BASE_DIR"), "load_dotenv()")
+    assert "BASE_DIR = Path(__file__).resolve().parent.parent\nload_dotenv()\n" in source
+    assert insert_after_node("x = 1", None, "import os") == "import os\nx = 1"
+
+
+def test_settings_rule_with_missing_setting(tmp_path):
+    ctx = ScaffoldContext.from_config(str(tmp_path), {})
+    content = SETTINGS.replace("INSTALLED_APPS", "APPS")
+
+    with pytest.raises(ValueError, match="INSTALLED_APPS"):
+        update_installed_apps(content, ctx)
+
+
+def test_transform_file_is_all_or_nothing(tmp_path):
+    path = tmp_path / "settings.py"
+    path.write_text(SETTINGS)
+
+    def add_debug(content: str) -> str:
+        return content + "DEBUG = False\n"
+
+    def missing_name(content: str) -> str:
+        if find_assignment(ast.parse(content), "MIDDLEWARE") is None:
+            raise ValueError("Couldn't find the 'MIDDLEWARE' setting.")
+        return content
+
+    def broken(content: str) -> str:
+        return content + "if True\n"
+
+    with pytest.raises(ValueError):
+        transform_file(str(path), [add_debug, missing_name])
+    with pytest.raises(SyntaxError):
+        transform_file(str(path), [add_debug, broken])
+    assert path.read_text() == SETTINGS
+    assert [p.name for p in tmp_path.iterdir()] == ["settings.py"]
+
+    transform_file(str(path), [add_debug])
+    assert path.read_text() == SETTINGS + "DEBUG = False\n"